@@ -1,6 +1,7 @@
 from snowball.archive import symbols
 from snowball.timeseries import TimeSeries
 from snowball.fundamental import KrseStock
+from snowball.writer import writer
 
 
 
@@ -1,2 +1,5 @@
 from snowball.archive.book import symbols
-from snowball.archive.label import label
\ No newline at end of file
+from snowball.archive.label import label
+from snowball.archive.store import store
+from snowball.archive.bizdays import bizdays
+from snowball.archive.snapshot import snapshot
\ No newline at end of file
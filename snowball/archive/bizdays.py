@@ -0,0 +1,101 @@
+from snowball.define import lazy, atomic
+from datetime import datetime
+from pytz import timezone
+from bisect import bisect_left, bisect_right
+import os, json
+
+stock = lazy('pykrx.stock')
+
+
+class _bizdays(object):
+    """
+    KRX trading calendar derived from KOSPI(1001) daily history, cached on disk(krse/bizdays.json)
+
+    Cache is extended from its last date at most once a day(and once more after market open),
+    every query is a binary search on the cached dates(YYYYMMDD).
+    """
+    _path = os.path.join(os.path.dirname(__file__), r'krse/bizdays.json')
+    _since = '20000101'
+
+    def _fetch(self, fromdate:str, todate:str) -> list:
+        return stock.get_index_ohlcv_by_date(fromdate=fromdate, todate=todate, ticker='1001').index.strftime("%Y%m%d").tolist()
+
+    @property
+    def dates(self) -> list:
+        """
+        :return: sorted trading dates in YYYYMMDD
+        """
+        now = datetime.now(timezone('Asia/Seoul'))
+        today = now.strftime("%Y%m%d")
+        limit = f"{today}{'0900' if now.hour >= 9 else '0000'}"
+        if hasattr(self, '__dates') and (self.__getattribute__('__dates')[-1] == today or self._updated >= limit):
+            return self.__getattribute__('__dates')
+
+        dates, updated = list(), str()
+        if os.path.isfile(self._path):
+            with open(self._path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            dates, updated = cache['dates'], cache['updated']
+
+        if not dates or (dates[-1] < today and updated < limit):
+            fromdate = dates[-1] if dates else self._since
+            dates = sorted(set(dates + self._fetch(fromdate=fromdate, todate=today)))
+            updated = now.strftime("%Y%m%d%H%M")
+            with atomic(self._path) as f:
+                json.dump(dict(dates=dates, updated=updated), f)
+
+        self._updated = updated
+        self.__setattr__('__dates', dates)
+        return dates
+
+    def prev(self, date:str, inclusive:bool=True) -> str:
+        """
+        :param date      : YYYYMMDD
+        :param inclusive : [bool] if True, date itself is returned when it is a trading date
+        :return: latest trading date on or before(inclusive) / before date
+        """
+        dates = self.dates
+        n = bisect_right(dates, date) if inclusive else bisect_left(dates, date)
+        return dates[n - 1] if n else None
+
+    def next(self, date:str, inclusive:bool=True) -> str:
+        """
+        :param date      : YYYYMMDD
+        :param inclusive : [bool] if True, date itself is returned when it is a trading date
+        :return: earliest trading date on or after(inclusive) / after date
+        """
+        dates = self.dates
+        n = bisect_left(dates, date) if inclusive else bisect_right(dates, date)
+        return dates[n] if n < len(dates) else None
+
+    def nearest(self, date:str, prev:bool=True) -> str:
+        """
+        Local replacement of pykrx.stock.get_nearest_business_day_in_a_week
+        """
+        return self.prev(date) if prev else self.next(date)
+
+    def ago(self, sessions:int, date:str=str()) -> str:
+        """
+        :param sessions : [int] number of sessions
+        :param date     : YYYYMMDD, default latest trading date
+        :return: trading date N sessions before date
+        """
+        dates = self.dates
+        n = bisect_right(dates, date) - 1 if date else len(dates) - 1
+        return dates[n - sessions] if 0 <= n - sessions < len(dates) else None
+
+    def between(self, fromdate:str, todate:str) -> list:
+        """
+        :return: trading dates in [fromdate, todate]
+        """
+        dates = self.dates
+        return dates[bisect_left(dates, fromdate):bisect_right(dates, todate)]
+
+    def isopen(self, date:str) -> bool:
+        dates = self.dates
+        n = bisect_left(dates, date)
+        return n < len(dates) and dates[n] == date
+
+
+# Alias
+bizdays = _bizdays()
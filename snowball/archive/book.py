@@ -1,16 +1,28 @@
-from pykrx.stock import (
-    get_index_ticker_list,
-    get_index_ticker_name
-)
-from stocksymbol import StockSymbol
-from snowball.define import xml2df
+from snowball.archive.search import _searchIndex
+from snowball.define import xml2df, lazy, atomic
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-import os, requests
+import os, requests, json, threading
+
+stock = lazy('pykrx.stock')
+stocksymbol = lazy('stocksymbol')
 
 
 class _symbols(object):
-    _engine_s = StockSymbol("95012214-44b0-4664-813f-a7ef5ad3b0b4")
     _dir = os.path.dirname(__file__)
+    _index_path = os.path.join(_dir, r'symbols.json')
+    _index_version = 2
+    _index_expiry = timedelta(days=7)
+    _index_lock = threading.RLock()
+    _krx_path = os.path.join(_dir, r'krse/krx.json')
+    _krx_workers = 8
+
+    @property
+    def _engine_s(self):
+        if not hasattr(self, '__engine_s'):
+            self.__setattr__('__engine_s', stocksymbol.StockSymbol("95012214-44b0-4664-813f-a7ef5ad3b0b4"))
+        return self.__getattribute__('__engine_s')
 
     @property
     def kr(self) -> pd.DataFrame:
@@ -107,12 +119,60 @@ class _symbols(object):
         48   NaN            NaN   2217            코스닥 150 헬스케어   NaN        NaN    NaN                 NaN
         49   NaN            NaN   2218  코스닥 150 커뮤니케이션서비스   NaN        NaN    NaN                 NaN
         """
-        objs = dict()
-        for market in ('KOSPI', 'KOSDAQ', 'KRX', '테마'):
-            indices = get_index_ticker_list(market=market)
-            names = [get_index_ticker_name(i) for i in indices]
-            objs[market] = pd.DataFrame(data={'지수': indices, '지수명': names})
-        return pd.concat(objs=objs, axis=1)
+        if not hasattr(self, '__krx'):
+            objs = {
+                market: pd.DataFrame(data=indices, columns=['지수', '지수명'], dtype=object)
+                for market, indices in self._krx_catalogue().items()
+            }
+            self.__setattr__('__krx', pd.concat(objs=objs, axis=1))
+        return self.__getattribute__('__krx')
+
+    def _build_krx(self) -> dict:
+        with ThreadPoolExecutor(max_workers=self._krx_workers) as executor:
+            markets = ('KOSPI', 'KOSDAQ', 'KRX', '테마')
+            lists = dict(zip(markets, executor.map(lambda m: stock.get_index_ticker_list(market=m), markets)))
+            codes = [code for market in markets for code in lists[market]]
+            names = dict(zip(codes, executor.map(stock.get_index_ticker_name, codes)))
+        catalogue = {market: [[code, names[code]] for code in lists[market]] for market in markets}
+
+        cache = dict(updated=datetime.now().strftime("%Y%m%d"), catalogue=catalogue)
+        with atomic(self._krx_path) as f:
+            json.dump(cache, f, ensure_ascii=False)
+        return catalogue
+
+    def _krx_catalogue(self) -> dict:
+        """
+        KRX index catalogue, persisted locally(krse/krx.json) and rebuilt when older than _index_expiry
+        :return: {market: [[지수, 지수명], ...]}
+        """
+        if not hasattr(self, '__krxcatalogue'):
+            with self._index_lock:
+                if hasattr(self, '__krxcatalogue'):
+                    return self.__getattribute__('__krxcatalogue')
+                cache = dict()
+                if os.path.isfile(self._krx_path):
+                    with open(self._krx_path, 'r', encoding='utf-8') as f:
+                        cache = json.load(f)
+                if not cache or datetime.strptime(cache['updated'], "%Y%m%d") + self._index_expiry < datetime.now():
+                    # noinspection PyBroadException
+                    try:
+                        cache['catalogue'] = self._build_krx()
+                    except Exception as e:
+                        if not cache:
+                            raise
+                        print(f"\t- Failed refreshing KRX index catalogue, stored one is used: {e}")
+                self.__setattr__('__krxcatalogue', cache['catalogue'])
+        return self.__getattribute__('__krxcatalogue')
+
+    def krxname(self, ticker:str) -> str:
+        """
+        :param ticker : [str] KRX index ticker, e.g. 1001
+        :return: name of index(e.g. 코스피) from catalogue, None if not found
+        """
+        if not hasattr(self, '__krxname'):
+            names = {code: name for indices in self._krx_catalogue().values() for code, name in indices}
+            self.__setattr__('__krxname', names)
+        return self.__getattribute__('__krxname').get(ticker)
 
     def econtain(self, symbol:str):
         if not hasattr(self, f'__ecos{symbol}'):
@@ -129,17 +189,77 @@ class _symbols(object):
             self.__setattr__(f'__ecos{symbol}', xml2df(url=url)[columns.keys()].rename(columns=columns))
         return self.__getattribute__(f'__ecos{symbol}')
 
+    def _build_index(self) -> dict:
+        with self._index_lock:
+            texts = lambda *args: [t for t in args if isinstance(t, str) and t]
+            index = dict()
+            us = self.us.reindex(columns=['longName', 'shortName'])
+            for symbol, r in zip(us.index, us.itertuples(index=False)):
+                index[symbol] = ['nyse', r.longName, 'USD', texts(r.shortName)]
+            for symbol, name in zip(self.ecos.symbol, self.ecos.name):
+                index[symbol] = ['ecos', name, '%', list()]
+            kr = self.kr.reindex(columns=['longName', 'name', 'shortName'])
+            for symbol, r in zip(kr.index, kr.itertuples(index=False)):
+                index[symbol] = ['krse', r.longName, 'KRW', texts(r.name if isinstance(r.name, str) else r.longName, r.shortName)]
+
+            cache = dict(version=self._index_version, updated=datetime.now().strftime("%Y%m%d"), index=index)
+            with atomic(self._index_path) as f:
+                json.dump(cache, f, ensure_ascii=False)
+            self.__setattr__('__index', index)
+        return index
+
+    def _refresh_index(self):
+        # noinspection PyBroadException
+        try:
+            self._build_index()
+        except Exception as e:
+            print(f"\t- Failed refreshing symbol index: {e}")
+
+    @property
+    def index(self) -> dict:
+        """
+        Symbol resolution index(krse, nyse, ecos), persisted locally(symbols.json)
+        Stale index(older than _index_expiry) is served as is while refreshed in background.
+        :return: {symbol: [market, name, unit, [other names for search, Korean name(displayed by search) first for krse]]}
+        """
+        if not hasattr(self, '__index'):
+            with self._index_lock:
+                if hasattr(self, '__index'):
+                    return self.__getattribute__('__index')
+                cache = dict()
+                if os.path.isfile(self._index_path):
+                    with open(self._index_path, 'r', encoding='utf-8') as f:
+                        cache = json.load(f)
+                if not cache.get('version') == self._index_version:
+                    return self._build_index()
+
+                self.__setattr__('__index', cache['index'])
+                if datetime.strptime(cache['updated'], "%Y%m%d") + self._index_expiry < datetime.now():
+                    threading.Thread(target=self._refresh_index, daemon=True).start()
+        return self.__getattribute__('__index')
+
+    def search(self, query:str, limit:int=10) -> list:
+        """
+        Search symbols of kr, us and ecos by symbol or name(Korean / English), ranked by exact, prefix, substring, fuzzy
+        :param query : [str] e.g. "삼성전", "005930", "apple"
+        :param limit : [int] maximum number of results
+        :return: [(symbol, name, market), ...]
+        """
+        if not hasattr(self, '__search'):
+            rows = [
+                (symbol, others[0] if market == 'krse' and others else name, market, [symbol, name, *others])
+                for symbol, (market, name, _, others) in self.index.items()
+            ]
+            self.__setattr__('__search', _searchIndex(rows))
+        return self.__getattribute__('__search').search(query, limit=limit)
+
     def locate(self, symbol:str):
         if symbol.isdigit() and len(symbol) == 4:
             return 'krx'
         elif symbol.isdigit() and len(symbol) == 6:
             return 'krse'
-        elif symbol in self.ecos.symbol.values:
-            return 'ecos'
-        elif symbol in self.us.index:
-            return 'nyse'
-        else:
-            pass
+        elif symbol in self.index:
+            return self.index[symbol][0]
         return 'fred'
 
 # Alias
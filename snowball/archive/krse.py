@@ -1,17 +1,14 @@
-from pykrx.stock import (
-    get_market_cap_by_ticker,
-    get_market_fundamental,
-    get_market_ohlcv_by_ticker,
-    get_market_ohlcv_by_date,
-    get_nearest_business_day_in_a_week,
-    get_etf_ohlcv_by_ticker
-)
+from snowball.archive.bizdays import bizdays, stock
+from snowball.archive.snapshot import snapshot
+from snowball.archive.table import _table
+from snowball.define import atomic
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from pytz import timezone
 import numpy as np
 import pandas as pd
-import requests, time, os, json
+import requests, random, time, os, json, shutil
 import urllib.request as req
 
 
@@ -24,7 +21,7 @@ class _krseTime(object):
     @property
     def rdate(self) -> str:
         if not hasattr(self, '__rdate'):
-            self.__setattr__('__rdate', get_nearest_business_day_in_a_week(date=self._date, prev=True))
+            self.__setattr__('__rdate', bizdays.nearest(date=self._date, prev=True))
         return self.__getattribute__('__rdate')
 
     @property
@@ -42,7 +39,7 @@ class _krseTime(object):
             td = datetime.strptime(self.rdate, "%Y%m%d")
             dm = lambda x: (td - timedelta(x)).strftime("%Y%m%d")
             loop = [('1D', 1), ('1W', 7), ('1M', 30), ('3M', 91), ('6M', 183), ('1Y', 365), ('2Y', 730)]
-            base.update({l: get_nearest_business_day_in_a_week(date=dm(d)) for l, d in loop})
+            base.update({l: bizdays.nearest(date=dm(d)) for l, d in loop})
             self.__setattr__('__dates', base)
         return self.__getattribute__('__dates')
 
@@ -119,23 +116,71 @@ class _krseGroup(_krseTime):
         }
     }
     _wise_url = 'http://www.wiseindex.com/Index/GetIndexComponets?ceil_yn=0&dt=%s&sec_cd=%s'
+    _wise_workers = 4
+    _wise_retries = 6
+    _wise_backoff = 1.0
+
+    def _fetch_sector(self, name:str, code:str, wdate:str) -> list:
+        """
+        Components of one sector, checkpointed on disk(krse/wise/{wdate}/{code}.json) once fetched
+        :return: [[종목코드, 종목명, 산업, 섹터], ...]
+        """
+        path = os.path.join(self._dir, 'wise', wdate, f'{code}.json')
+        if os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        for n in range(self._wise_retries):
+            try:
+                resp = requests.get(self._wise_url % (wdate, code), timeout=30)
+                if resp.status_code == 200:
+                    data = [[_['CMP_CD'], _['CMP_KOR'], _['SEC_NM_KOR'], _['IDX_NM_KOR'][5:]] for _ in resp.json()['list']]
+                    with atomic(path) as f:
+                        json.dump(data, f, ensure_ascii=False)
+                    return data
+                error = f'HTTP {resp.status_code}'
+            except (requests.RequestException, ValueError, KeyError) as e:
+                error = repr(e)
+            if n < self._wise_retries - 1:
+                time.sleep(self._wise_backoff * 2 ** n * random.uniform(0.5, 1.5))
+        raise ConnectionError(f'Failed fetching WISE category {name} / {self._labels[name][code]}({code}): {error}')
+
+    def _clear_wise(self, wdate:str, codes:list=None):
+        """
+        Remove checkpoints of dates other than wdate, and those of codes on wdate(directory as well if emptied)
+        """
+        root = os.path.join(self._dir, 'wise')
+        if not os.path.isdir(root):
+            return
+        for d in os.listdir(root):
+            if d != wdate:
+                shutil.rmtree(os.path.join(root, d), ignore_errors=True)
+        for c in codes or list():
+            path = os.path.join(root, wdate, f'{c}.json')
+            if os.path.isfile(path):
+                os.remove(path)
+        if os.path.isdir(os.path.join(root, wdate)) and not os.listdir(os.path.join(root, wdate)):
+            os.rmdir(os.path.join(root, wdate))
+        return
 
     def _fetch(self, name:str) -> pd.DataFrame:
-        loop, data = tqdm(self._labels[name].items()), list()
-        for c, l in loop:
-            loop.set_description(desc=f'{name} / {l}({c}) ...')
-            for n in range(6):
-                req = requests.get(self._wise_url % (self.wdate, c))
-                if req.status_code == 200:
-                    for _ in req.json()['list']:
-                        data.append([_['CMP_CD'], _['CMP_KOR'], _['SEC_NM_KOR'], _['IDX_NM_KOR'][5:], self.wdate])
-                    break
-                print(
-                    f"\t- Failed fetching WISE category {name} / {l}({c})" if n == 5 else \
-                    f"\t- HTTP Error while fetching WISE category {name} / {l}({c})... redirecting... ({n + 1})"
-                )
-                if n < 5:
-                    time.sleep(5)
+        wdate, labels = self.wdate, self._labels[name]
+        fetched, failed = dict(), list()
+        self._clear_wise(wdate)
+        with ThreadPoolExecutor(max_workers=self._wise_workers) as executor:
+            jobs = {executor.submit(self._fetch_sector, name, c, wdate): c for c in labels}
+            for job in tqdm(as_completed(jobs), total=len(jobs), desc=f'{name} ...'):
+                try:
+                    fetched[jobs[job]] = job.result()
+                except ConnectionError as e:
+                    failed.append(str(e))
+        if failed:
+            for e in failed:
+                print(f"\t- {e}")
+            raise ConnectionError(f'{len(failed)} of {len(labels)} WISE category {name} failed, fetched ones are kept to resume')
+
+        data = [row + [wdate] for c in labels for row in fetched[c]]
+        self._clear_wise(wdate, codes=list(labels))
         return pd.DataFrame(data=data, columns=['종목코드', '종목명', '산업', '섹터', 'DT']).set_index(keys='종목코드')
 
     @property
@@ -148,8 +193,11 @@ class _krseGroup(_krseTime):
             fetch = pd.read_csv(os.path.join(self._dir, 'wics.csv'), index_col='종목코드', encoding='utf-8')
             fetch.index = fetch.index.astype(str).str.zfill(6)
             if not str(fetch['DT'][0]) == self.wdate:
-                fetch = self._fetch(name='WICS')
-                fetch.to_csv(os.path.join(self._dir, 'wics.csv'), index=True, encoding='utf-8')
+                try:
+                    fetch = self._fetch(name='WICS')
+                    fetch.to_csv(os.path.join(self._dir, 'wics.csv'), index=True, encoding='utf-8')
+                except ConnectionError as e:
+                    print(f"\t- {e}\n\t- Using WICS of {fetch['DT'].iloc[0]} instead")
             self.__setattr__(f'__wics', fetch.drop(columns=['DT']))
         return self.__getattribute__(f'__wics')
 
@@ -159,21 +207,36 @@ class _krseGroup(_krseTime):
             fetch = pd.read_csv(os.path.join(self._dir, 'wi26.csv'), index_col='종목코드', encoding='utf-8')
             fetch.index = fetch.index.astype(str).str.zfill(6)
             if not str(fetch['DT'][0]) == self.wdate:
-                fetch = self._fetch(name='WI26')
-                fetch.drop(columns=['산업'], inplace=True)
-                fetch.to_csv(os.path.join(self._dir, 'wi26.csv'), index=True, encoding='utf-8')
+                try:
+                    fetch = self._fetch(name='WI26')
+                    fetch.drop(columns=['산업'], inplace=True)
+                    fetch.to_csv(os.path.join(self._dir, 'wi26.csv'), index=True, encoding='utf-8')
+                except ConnectionError as e:
+                    print(f"\t- {e}\n\t- Using WI26 of {fetch['DT'].iloc[0]} instead")
             self.__setattr__(f'__wi26', fetch.drop(columns=['DT']))
         return self.__getattribute__(f'__wi26')
 
 
 class _krse(_krseGroup):
     _insi = False
-    _pdir = os.path.join(os.path.dirname(__file__), rf'krse/perf.csv')
+    _db = os.path.join(os.path.dirname(__file__), rf'krse/krse.db')
+    _perf = _table(
+        path=_db, name='perf', key='종목코드', csv=os.path.join(os.path.dirname(__file__), rf'krse/perf.csv'),
+        columns={**{c: float for c in ['R1D', 'R1W', 'R1M', 'R3M', 'R6M', 'R1Y', 'R2Y']}, 'DT': str}
+    )
+    _basis = _table(
+        path=_db, name='basis', key='종목코드', csv=os.path.join(os.path.dirname(__file__), rf'krse/basis.csv'),
+        columns={
+            '종목명': str, 'IPO': 'date', '종가': int, '시가총액': int, '거래량': int, '거래대금': int, '상장주식수': int,
+            'BPS': float, 'PER': float, 'PBR': float, 'EPS': float, 'DIV': float, 'DPS': float, 'DT': str
+        }
+    )
+
     def _get_marketcap(self) -> pd.DataFrame:
-        return get_market_cap_by_ticker(date=self.rdate, market="ALL", alternative=True)
+        return stock.get_market_cap_by_ticker(date=self.rdate, market="ALL", alternative=True)
 
     def _get_multiples(self) -> pd.DataFrame:
-        return get_market_fundamental(date=self.rdate, market="ALL", alternative=True)
+        return stock.get_market_fundamental(date=self.rdate, market="ALL", alternative=True)
 
     def _get_ipo(self) -> pd.DataFrame:
         io = 'http://kind.krx.co.kr/corpgeneral/corpList.do?method=download'
@@ -186,13 +249,13 @@ class _krse(_krseGroup):
     def _init_p(self) -> pd.DataFrame:
         if not hasattr(self, '__p'):
             shares = pd.concat(objs={
-                'prev': get_market_cap_by_ticker(date=self.dates['1Y'], market='ALL')['상장주식수'],
-                'curr': get_market_cap_by_ticker(date=self.dates['0D'], market='ALL')['상장주식수']
+                'prev': stock.get_market_cap_by_ticker(date=self.dates['1Y'], market='ALL')['상장주식수'],
+                'curr': stock.get_market_cap_by_ticker(date=self.dates['0D'], market='ALL')['상장주식수']
             }, axis=1)
             even = shares[shares.prev == shares.curr].index.tolist()
 
             prc = pd.concat({
-                f'TD{k}': get_market_ohlcv_by_ticker(date=date, market='ALL', alternative=False)['종가']
+                f'TD{k}': stock.get_market_ohlcv_by_ticker(date=date, market='ALL', alternative=False)['종가']
                 for k, date, in tqdm(self.dates.items(), desc='기간별 수익률 계산(주식)')
             }, axis=1)
 
@@ -205,27 +268,38 @@ class _krse(_krseGroup):
             self.__setattr__('__p',_p)
         return self.__getattribute__('__p')
 
-    def _update_p(self, tickers: list) -> pd.DataFrame:
-        if not len(tickers):
-            return pd.DataFrame()
-
+    def _fetch_p(self, tickers: list) -> pd.DataFrame:
         objs, proc = list(), tqdm(tickers)
         for ticker in proc:
             proc.set_description(f'Fetch Returns - {ticker}')
-            c = get_market_ohlcv_by_date(ticker=ticker, fromdate=self.dates['2Y'], todate=self.dates['0D'])['종가']
+            c = stock.get_market_ohlcv_by_date(ticker=ticker, fromdate=self.dates['2Y'], todate=self.dates['0D'])['종가']
             objs.append({
                 label: round(100 * c.pct_change(periods=dt)[-1], 2)
                 for label, dt in [('R1D', 1), ('R1W', 5), ('R1M', 21), ('R3M', 63), ('R6M', 126), ('R1Y', 252)]
             })
-        p = pd.DataFrame(data=objs, index=tickers)
+        return pd.DataFrame(data=objs, index=tickers)
+
+    def _update_p(self, tickers: list) -> pd.DataFrame:
+        if not len(tickers):
+            return pd.DataFrame()
+
+        # Returns from cached daily cross-sections; adjusted prices are fetched only for tickers
+        # whose shares changed within horizon(split, issue) or not found in cross-section
+        p, rest = snapshot.returns(
+            tickers=tickers,
+            date=self.rdate,
+            sessions=dict(R1D=1, R1W=5, R1M=21, R3M=63, R6M=126, R1Y=252),
+            final=not self.is_open
+        )
+        if rest:
+            p = pd.concat(objs=[p.drop(index=rest), self._fetch_p(tickers=rest)], axis=0)
         p['DT'] = self.rdate
         return p
 
     def performance(self, tickers:list or pd.Series or np.array):
-        read = pd.read_csv(filepath_or_buffer=self._pdir, index_col='종목코드', encoding='utf-8')
-        read.index = read.index.astype(str).str.zfill(6)
+        read = self._perf.read(keys=tickers)
         if self.is_open and not self._insi:
-            return read[read.index.isin(tickers)].drop(columns=['DT'])
+            return read.drop(columns=['DT'])
 
         init = self._init_p()
         p = pd.concat(objs=[init, read[~read.index.isin(init.index)]], axis=0)
@@ -235,9 +309,8 @@ class _krse(_krseGroup):
         upd = self._update_p(tickers=pick[pick['DT'].astype(str) != self.rdate].index)
 
         push = pd.concat(objs=[init, new, upd], axis=0)
+        self._perf.upsert(push)
         save = pd.concat(objs=[push, read[~read.index.isin(push.index)]], axis=0)
-        save.index.name = '종목코드'
-        save.to_csv(self._pdir, index=True, encoding='utf-8')
         return save[save.index.isin(tickers)].drop(columns=['DT'])
 
     @property
@@ -251,15 +324,12 @@ class _krse(_krseGroup):
     @property
     def overview(self) -> pd.DataFrame:
         if not hasattr(self, '__basis'):
-            path = os.path.join(os.path.dirname(__file__), rf'krse/basis.csv')
-            _base = pd.read_csv(path, index_col='종목코드', encoding='utf-8')
-            _base.index = _base.index.astype(str).str.zfill(6)
-            _base.IPO = pd.to_datetime(_base.IPO)
-            if not self.is_open and not str(_base['DT'][0]) == self.rdate:
+            _base = self._basis.read()
+            if not self.is_open and (_base.empty or not _base['DT'].iloc[0] == self.rdate):
                 _base = pd.concat(objs = [self._get_ipo(), self._get_marketcap(), self._get_multiples()], axis=1)
                 _base['DT'] = self.rdate
                 _base.index.name = '종목코드'
-                _base.to_csv(path, index=True, encoding='utf-8')
+                self._basis.upsert(_base, replace=True)
             self.__setattr__('__basis', _base.drop(columns=['DT']))
         return self.__getattribute__('__basis')
 
@@ -292,7 +362,7 @@ class _krseETF(object):
     def returns(self) -> pd.DataFrame:
         if not hasattr(self, '__performance'):
             prc = pd.concat({
-                f'TD{k}': get_etf_ohlcv_by_ticker(date=date)['종가']
+                f'TD{k}': stock.get_etf_ohlcv_by_ticker(date=date)['종가']
                 for k, date in tqdm(self.dates.items(), desc='기간별 수익률 계산(ETF)')
             }, axis=1)
             rtrn = pd.concat({
@@ -1,5 +1,4 @@
-from snowball.archive.book import symbols
-from pykrx.stock import get_index_ticker_name
+from snowball.archive.book import symbols, stock
 
 
 class label(object):
@@ -27,9 +26,10 @@ class label(object):
     def name(self) -> str:
        if not hasattr(self, '__name'):
            if self.market == 'krx':
-               self.__setattr__('__name', get_index_ticker_name(self.ticker))
+               self.__setattr__('__name', symbols.krxname(self.ticker) or stock.get_index_ticker_name(self.ticker))
            elif self.market == 'krse':
-               self.__setattr__('__name', symbols.kr.loc[self.ticker, 'longName'])
+               entry = symbols.index.get(self.ticker)
+               self.__setattr__('__name', entry[1] if entry else symbols.kr.loc[self.ticker, 'longName'])
            elif self.market == 'ecos':
                self.__setattr__('__name', self.label)
            else:
@@ -43,7 +43,10 @@ class label(object):
     @property
     def unit(self) -> str:
        if not hasattr(self, '__unit'):
-           if self.market == 'krx':
+           entry = symbols.index.get(self.ticker)
+           if entry and entry[0] == self.market:
+               self.__setattr__('__unit', entry[2])
+           elif self.market == 'krx':
                self.__setattr__('__unit', '-')
            elif self.market == 'krse':
                self.__setattr__('__unit', 'KRW')
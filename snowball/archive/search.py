@@ -0,0 +1,138 @@
+from bisect import bisect_left
+from collections import Counter
+import re
+
+
+_CHO = ['ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+_JUNG = ['ㅏ', 'ㅐ', 'ㅑ', 'ㅒ', 'ㅓ', 'ㅔ', 'ㅕ', 'ㅖ', 'ㅗ', 'ㅗㅏ', 'ㅗㅐ', 'ㅗㅣ', 'ㅛ', 'ㅜ', 'ㅜㅓ', 'ㅜㅔ', 'ㅜㅣ',
+         'ㅠ', 'ㅡ', 'ㅡㅣ', 'ㅣ']
+_JONG = ['', 'ㄱ', 'ㄲ', 'ㄱㅅ', 'ㄴ', 'ㄴㅈ', 'ㄴㅎ', 'ㄷ', 'ㄹ', 'ㄹㄱ', 'ㄹㅁ', 'ㄹㅂ', 'ㄹㅅ', 'ㄹㅌ', 'ㄹㅍ', 'ㄹㅎ', 'ㅁ',
+         'ㅂ', 'ㅂㅅ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+_JAMO = {0xAC00 + n: _CHO[n // 588] + _JUNG[(n % 588) // 28] + _JONG[n % 28] for n in range(11172)}
+_JAMO.update({ord(c): d for c, d in zip(
+    ['ㄳ', 'ㄵ', 'ㄶ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ', 'ㅄ', 'ㅘ', 'ㅙ', 'ㅚ', 'ㅝ', 'ㅞ', 'ㅟ', 'ㅢ'],
+    [_JONG[3], _JONG[5], _JONG[6], _JONG[9], _JONG[10], _JONG[11], _JONG[12], _JONG[13], _JONG[14], _JONG[15], _JONG[18],
+     _JUNG[9], _JUNG[10], _JUNG[11], _JUNG[14], _JUNG[15], _JUNG[16], _JUNG[19]]
+)})
+_SPACE = re.compile(r'[\s\-_.,()&]+')
+
+
+def normalize(text:str) -> str:
+    """
+    Search key of text: lower case without spaces / punctuation, Hangul syllables decomposed into jamo
+    so that incomplete syllable while typing(e.g. 삼성저) is a prefix of complete one(삼성전자)
+    """
+    return _SPACE.sub('', str(text).lower()).translate(_JAMO)
+
+
+class _searchIndex(object):
+    """
+    In-memory symbol search index, ranked by exact > prefix > substring > fuzzy(trigram overlap)
+
+      - prefix    : binary search on sorted keys, ranking of a prefix matching many keys(short query) is kept once built
+      - substring : intersection of n-gram(1 ~ 3) postings, verified by containment
+      - fuzzy     : count of shared trigrams, only when fewer than limit found above
+    """
+    def __init__(self, rows:list):
+        """
+        :param rows : [(symbol, name, market, [search texts]), ...]
+        """
+        self.rows = [(symbol, name, market) for symbol, name, market, _ in rows]
+        pairs = sorted(set(
+            (normalize(text), n) for n, (_, _, _, texts) in enumerate(rows) for text in texts if isinstance(text, str) and text
+        ))
+        pairs = [(key, n) for key, n in pairs if key]
+        self.keys, self.ids = [key for key, _ in pairs], [n for _, n in pairs]
+        self.grams = [dict(), dict(), dict()]
+        for k, key in enumerate(self.keys):
+            for size in (1, 2, 3):
+                for gram in {key[i:i + size] for i in range(len(key) - size + 1)}:
+                    self.grams[size - 1].setdefault(gram, []).append(k)
+        self.grams = [{gram: frozenset(posting) for gram, posting in grams.items()} for grams in self.grams]
+        self.prefixes = dict()
+        return
+
+    def _prefix(self, q:str) -> list:
+        """
+        :return: [(rank, row), ...] of every row of which key starts with q, best first
+        """
+        if q in self.prefixes:
+            return self.prefixes[q]
+        lo = bisect_left(self.keys, q)
+        hi = bisect_left(self.keys, q + chr(0x10FFFF), lo)
+        rank = dict()
+        for key, row in zip(self.keys[lo:hi], self.ids[lo:hi]):
+            rank[row] = min(rank.get(row, (9,)), (0 if key == q else 1, len(key)))
+        ranked = sorted(((r, row) for row, r in rank.items()), key=lambda x: (x[0], self.rows[x[1]][0]))
+        if hi - lo > 200:
+            self.prefixes[q] = ranked
+        return ranked
+
+    def __len__(self):
+        return len(self.rows)
+
+    def search(self, query:str, limit:int=10) -> list:
+        """
+        :param query : [str] symbol or (part of) name in Korean / English
+        :param limit : [int] maximum number of results
+        :return: [(symbol, name, market), ...] by rank
+        """
+        q = normalize(query)
+        if not q:
+            return list()
+        rank = {row: r for r, row in self._prefix(q)[:max(200, 4 * limit)]}
+
+        if len(rank) < limit:
+            size = min(len(q), 3)
+            grams = sorted({q[i:i + size] for i in range(len(q) - size + 1)}, key=lambda g: len(self.grams[size - 1].get(g, ())))
+            found = self.grams[size - 1].get(grams[0], frozenset())
+            for gram in grams[1:]:
+                if not found:
+                    break
+                found = found & self.grams[size - 1].get(gram, frozenset())
+            for k in found:
+                if q in self.keys[k]:
+                    row = self.ids[k]
+                    rank[row] = min(rank.get(row, (9,)), (2, len(self.keys[k])))
+
+        if len(rank) < limit and len(q) >= 3:
+            grams = {q[i:i + 3] for i in range(len(q) - 2)}
+            count = Counter()
+            for gram in grams:
+                count.update(self.grams[2].get(gram, ()))
+            least = max(1, len(grams) // 2)
+            for k, c in count.most_common(4 * limit):
+                if c < least:
+                    break
+                row = self.ids[k]
+                rank[row] = min(rank.get(row, (9,)), (3, -c, len(self.keys[k])))
+
+        ranked = sorted(rank.items(), key=lambda x: (x[1], self.rows[x[0]][0]))[:limit]
+        return [self.rows[row] for row, _ in ranked]
+
+
+if __name__ == "__main__":
+    import random, time
+
+    random.seed(0)
+    syllables = [chr(0xAC00 + random.randrange(11172)) for _ in range(300)]
+    rows = [('005930', '삼성전자', 'krse', ['005930', '삼성전자', 'Samsung Electronics']),
+            ('005935', '삼성전자우', 'krse', ['005935', '삼성전자우', 'Samsung Electronics Pref'])]
+    rows += [
+        (f'{n:06d}', ''.join(random.choices(syllables, k=random.randint(2, 8))), 'krse', list())
+        for n in range(3000)
+    ]
+    rows += [
+        (''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ', k=4)), f'Company {n} Inc.', 'nyse', list())
+        for n in range(9000)
+    ]
+    rows = [(s, name, m, texts or [s, name]) for s, name, m, texts in rows]
+
+    tic = time.perf_counter()
+    index = _searchIndex(rows)
+    print(f'Build {len(index)} rows: {time.perf_counter() - tic:.3f}s')
+    for query in ['삼성전', '삼성저', '성전자', 'samsung', 'sam', 'company 12', '삼선전자', 'zzzz']:
+        tic = time.perf_counter()
+        for _ in range(100):
+            found = index.search(query, limit=10)
+        print(f'{query}: {1e3 * (time.perf_counter() - tic) / 100:.3f}ms / {found[:3]}')
@@ -0,0 +1,64 @@
+from snowball.archive.bizdays import bizdays, stock
+from snowball.define import atomic
+import pandas as pd
+import numpy as np
+import os
+
+
+class _snapshot(object):
+    """
+    Daily full-market cross-sections(종가, 상장주식수 of every KRSE ticker), one parquet per trading date
+
+    A closed session never changes, so each date is fetched once and kept incrementally;
+    returns of any ticker set are array lookups on the cached cross-sections.
+    """
+    _dir = os.path.join(os.path.dirname(__file__), r'snapshot')
+
+    def get(self, date:str, final:bool=True) -> pd.DataFrame:
+        """
+        :param date  : YYYYMMDD, trading date
+        :param final : [bool] False if the session is not closed yet, then fetched snapshot is not kept
+        :return:
+                     종가     상장주식수
+            티커
+            095570   4345      19930000
+        """
+        if hasattr(self, f'__{date}'):
+            return self.__getattribute__(f'__{date}')
+
+        path = os.path.join(self._dir, f'{date}.parquet')
+        if os.path.isfile(path):
+            snap = pd.read_parquet(path)
+        else:
+            snap = stock.get_market_cap_by_ticker(date=date, market='ALL')[['종가', '상장주식수']]
+            snap.index = snap.index.astype(str)
+            if not final:
+                return snap
+            with atomic(path, 'wb') as f:
+                snap.to_parquet(f)
+        self.__setattr__(f'__{date}', snap)
+        return snap
+
+    def returns(self, tickers:list, date:str, sessions:dict, final:bool=True) -> (pd.DataFrame, list):
+        """
+        :param tickers  : [list] tickers
+        :param date     : YYYYMMDD, trading date of returns
+        :param sessions : {label: number of sessions}, e.g. {'R1D': 1, 'R1W': 5}
+        :param final    : [bool] False if the session of date is not closed yet
+        :return: returns[%] by ticker and label, tickers not comparable by cross-section
+                 (missing on date, or 상장주식수 changed by split / issue within horizon)
+        """
+        tickers = list(tickers)
+        base = self.get(date, final=final).reindex(tickers)
+        price, shares = base['종가'].values.astype(float), base['상장주식수'].values.astype(float)
+
+        objs, uncomparable = dict(), ~np.isfinite(price)
+        for label, n in sessions.items():
+            prev = self.get(bizdays.ago(n, date)).reindex(tickers)
+            objs[label] = np.round(100 * (price / prev['종가'].values.astype(float) - 1), 2)
+            uncomparable |= (prev['상장주식수'].values != shares) & prev['상장주식수'].notna().values
+        return pd.DataFrame(data=objs, index=tickers), [t for t, u in zip(tickers, uncomparable) if u]
+
+
+# Alias
+snapshot = _snapshot()
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+from pytz import timezone
+from snowball.define import atomic
+import pandas as pd
+import numpy as np
+import os, json, hashlib, threading
+
+
+class _ohlcvStore(object):
+    """
+    On-disk columnar(Parquet) store of fetched time-series, keyed by market and ticker.
+
+    Each key is kept as one parquet file and one json sidecar holding the fetched range:
+      - since: earliest date ever requested (YYYYMMDD)
+      - until: latest completed session ever requested (YYYYMMDD), see _ohlcvStore.settled()
+    Only the missing range is fetched from source and merged into the stored frame.
+    The sidecar also records rows and last date of the parquet it was written with, and is written last:
+    a pair not matching each other(e.g. interrupted write) is read as missing and fetched again.
+    """
+    _dir = os.path.join(os.path.dirname(__file__), r'ohlcv')
+    _close = {
+        'krx': ('Asia/Seoul', '1530'),
+        'krse': ('Asia/Seoul', '1530'),
+        'nyse': ('America/New_York', '1600'),
+    }
+
+    def settled(self, market:str) -> str:
+        """
+        :param market : [str] market of ticker (krx, krse, ecos, nyse, fred)
+        :return: latest date(YYYYMMDD) whose bar is final: today after market close, otherwise yesterday.
+                 ecos and fred have no intraday bar but publish late, so always yesterday
+        """
+        tz, close = self._close.get(market, ('Asia/Seoul', '2400'))
+        now = datetime.now(timezone(tz))
+        return (now if now.strftime("%H%M") >= close else now - timedelta(1)).strftime("%Y%m%d")
+
+    @staticmethod
+    def key(*args) -> str:
+        """
+        :param args : ticker and optional label (e.g. ecos item name)
+        :return: file-name safe key
+        """
+        ticker, label = args[0], '_'.join(args[1:])
+        return f"{ticker}_{hashlib.md5(label.encode('utf-8')).hexdigest()[:8]}" if label else ticker
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = dict()
+        return
+
+    def lock(self, market:str, key:str) -> threading.Lock:
+        """
+        :return: lock of key, held while a key is loaded(read, fetched and written)
+        """
+        with self._lock:
+            return self._locks.setdefault((market, key), threading.Lock())
+
+    def path(self, market:str, key:str) -> str:
+        return os.path.join(self._dir, market, key)
+
+    def read(self, market:str, key:str) -> (pd.DataFrame or None, dict):
+        path = self.path(market, key)
+        if not (os.path.isfile(f'{path}.parquet') and os.path.isfile(f'{path}.json')):
+            return None, dict()
+        with open(f'{path}.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        data = pd.read_parquet(f'{path}.parquet')
+        if 'rows' in meta and (meta['rows'], meta['last']) != (len(data), str(data.index[-1]) if len(data) else None):
+            return None, dict()
+        return data, meta
+
+    def write(self, market:str, key:str, data:pd.DataFrame, meta:dict):
+        path = self.path(market, key)
+        meta.update(rows=len(data), last=str(data.index[-1]) if len(data) else None)
+        with atomic(f'{path}.parquet', 'wb') as f:
+            data.to_parquet(f, index=True)
+        with atomic(f'{path}.json') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        return
+
+    def load(self, market:str, key:str, prev:datetime, curr:datetime, fetch) -> pd.DataFrame or pd.Series:
+        """
+        :param market : [str] market of ticker (krx, krse, ecos, nyse, fred)
+        :param key    : [str] key of ticker, see _ohlcvStore.key()
+        :param prev   : [datetime] start date of requested range
+        :param curr   : [datetime] end date of requested range
+        :param fetch  : [callable] fetch(prev, curr) from source, returns pd.DataFrame or pd.Series
+        :return: stored time-series within [prev, curr]
+        """
+        with self.lock(market, key):
+            return self._load(market, key, prev, curr, fetch)
+
+    def _load(self, market:str, key:str, prev:datetime, curr:datetime, fetch) -> pd.DataFrame or pd.Series:
+        _prev, _curr = prev.strftime("%Y%m%d"), curr.strftime("%Y%m%d")
+        # Unfinished session must not be recorded as fetched: requests reaching it re-fetch from the anchor bar
+        _until = min(_curr, self.settled(market))
+        stored, meta = self.read(market, key)
+        if stored is None:
+            data = fetch(prev, curr)
+            meta = dict(since=_prev, until=_until, series=isinstance(data, pd.Series))
+            stored = data.to_frame() if meta['series'] else data
+            self.write(market, key, stored, meta)
+        elif _prev < meta['since'] or _curr > meta['until']:
+            frame = lambda x: x.to_frame() if meta['series'] else x
+            objs = [stored]
+            if _prev < meta['since']:
+                objs.insert(0, frame(fetch(prev, datetime.strptime(meta['since'], "%Y%m%d") - timedelta(1))))
+                meta['since'] = _prev
+            if _curr > meta['until']:
+                # Re-fetch from the last completed bar: a partially traded bar is replaced, and any change on the
+                # overlapped bar means the source history has been re-adjusted(split, dividend) -> fetch in full
+                anchor = stored.index[-2] if len(stored) > 1 else stored.index[-1] if len(stored) else None
+                tail = frame(fetch(datetime.strptime(meta['until'], "%Y%m%d") if anchor is None else anchor, curr))
+                if anchor is not None and anchor in tail.index and not np.allclose(
+                    tail.loc[[anchor]].values.astype(float), stored.loc[[anchor]].values.astype(float), equal_nan=True
+                ):
+                    objs = [frame(fetch(datetime.strptime(meta['since'], "%Y%m%d"), curr))]
+                else:
+                    objs[-1] = stored if anchor is None else stored[stored.index < anchor]
+                    objs.append(tail)
+                meta['until'] = max(meta['until'], _until)
+            stored = pd.concat(objs=[o for o in objs if not o.empty] or objs[-1:], axis=0)
+            stored = stored[~stored.index.duplicated(keep='last')].sort_index()
+            self.write(market, key, stored, meta)
+
+        data = stored[
+            (stored.index >= prev.strftime("%Y-%m-%d")) &
+            (stored.index < (curr + timedelta(1)).strftime("%Y-%m-%d"))
+        ]
+        return data[data.columns[0]] if meta['series'] else data
+
+
+# Alias
+store = _ohlcvStore()
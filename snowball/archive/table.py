@@ -0,0 +1,95 @@
+import pandas as pd
+import numpy as np
+import sqlite3, os
+
+
+class _table(object):
+    """
+    Keyed table on SQLite with typed columns
+
+    Every write is one transaction, so an interrupted or concurrent run never leaves a partial table.
+    Empty table is migrated once from its legacy csv file, if given.
+    """
+    _types = {str: 'TEXT', int: 'INTEGER', float: 'REAL', 'date': 'TEXT'}
+
+    def __init__(self, path:str, name:str, key:str, columns:dict, csv:str=str()):
+        """
+        :param path    : [str] sqlite database file
+        :param name    : [str] table name
+        :param key     : [str] key column(e.g. 종목코드)
+        :param columns : {column: type} of str, int, float or 'date', except key
+        :param csv     : [str] legacy csv file to migrate from
+        """
+        self.path, self.name, self.key, self.columns, self.csv = path, name, key, columns, csv
+        return
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=60)
+        if not hasattr(self, '__init'):
+            conn.execute('PRAGMA journal_mode=WAL')
+            schema = [f'"{self.key}" TEXT PRIMARY KEY'] + [f'"{c}" {self._types[t]}' for c, t in self.columns.items()]
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.execute(f'CREATE TABLE IF NOT EXISTS "{self.name}" ({", ".join(schema)})')
+                empty = not conn.execute(f'SELECT COUNT(*) FROM "{self.name}"').fetchone()[0]
+                if empty and self.csv and os.path.isfile(self.csv):
+                    legacy = pd.read_csv(self.csv, index_col=self.key, encoding='utf-8', dtype={self.key: str})
+                    legacy.index = legacy.index.str.zfill(6)
+                    self._insert(conn, legacy)
+            self.__setattr__('__init', True)
+        return conn
+
+    def _insert(self, conn:sqlite3.Connection, df:pd.DataFrame):
+        cols = list(self.columns.keys())
+        df = df.reindex(columns=cols)
+        for c, t in self.columns.items():
+            if t == 'date':
+                df[c] = pd.to_datetime(df[c]).dt.strftime('%Y-%m-%d')
+            elif t == str:
+                df[c] = df[c].where(df[c].isna(), df[c].astype(str))
+        rows = df.astype(object).where(df.notna(), None)
+        names = ', '.join(f'"{c}"' for c in [self.key] + cols)
+        marks = ', '.join(['?'] * (len(cols) + 1))
+        conn.executemany(
+            f'INSERT OR REPLACE INTO "{self.name}" ({names}) VALUES ({marks})',
+            [(str(k), *v) for k, v in zip(rows.index, rows.itertuples(index=False, name=None))]
+        )
+        return
+
+    def read(self, keys:list or pd.Index or np.ndarray=None) -> pd.DataFrame:
+        """
+        :param keys : keys to read, default all
+        :return: typed frame indexed by key
+        """
+        conn = self._connect()
+        query = f'SELECT * FROM "{self.name}"'
+        if keys is None:
+            df = pd.read_sql(query, conn)
+        else:
+            keys, objs = [str(k) for k in keys], list()
+            for n in range(0, len(keys), 500):
+                chunk = keys[n:n + 500]
+                objs.append(pd.read_sql(f'{query} WHERE "{self.key}" IN ({", ".join(["?"] * len(chunk))})', conn, params=chunk))
+            df = pd.concat(objs=objs, axis=0, ignore_index=True) if objs else pd.read_sql(f'{query} LIMIT 0', conn)
+        conn.close()
+        for c, t in self.columns.items():
+            if t == 'date':
+                df[c] = pd.to_datetime(df[c])
+            elif t in (int, float):
+                df[c] = pd.to_numeric(df[c])
+        return df.set_index(keys=self.key)
+
+    def upsert(self, df:pd.DataFrame, replace:bool=False):
+        """
+        Insert or replace rows by key in one transaction
+        :param df      : frame indexed by key
+        :param replace : [bool] if True, existing rows are deleted first(full refresh)
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            if replace:
+                conn.execute(f'DELETE FROM "{self.name}"')
+            self._insert(conn, df)
+        conn.close()
+        return
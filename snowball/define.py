@@ -1,7 +1,47 @@
-from xml.etree.ElementTree import ElementTree, fromstring
+from xml.etree.ElementTree import iterparse
+from contextlib import contextmanager
 import pandas as pd
 import numpy as np
-import requests
+import requests, importlib, threading, os
+
+
+class lazy(object):
+    """
+    Module imported on first attribute access, for heavy dependencies(pykrx, yfinance, scipy, plotly ...)
+    so that "import snowball" does not pay for what the caller never uses.
+    e.g. stock = lazy('pykrx.stock') / stock.get_market_ohlcv_by_date(...)
+    """
+    def __init__(self, name:str):
+        self.__dict__['__name'] = name
+
+    def __getattr__(self, attr:str):
+        if not '__module' in self.__dict__:
+            self.__dict__['__module'] = importlib.import_module(self.__dict__['__name'])
+        return getattr(self.__dict__['__module'], attr)
+
+    def __repr__(self):
+        return f"<lazy module '{self.__dict__['__name']}'>"
+
+
+@contextmanager
+def atomic(path:str, mode:str='w'):
+    """
+    File written under a unique temporary name(process and thread) and replaced onto path on success,
+    so that readers never see a partial file and concurrent writers never clobber each other
+    e.g. with atomic(path) as f: json.dump(obj, f)
+    :param path : [str] file path, parent directory is created if missing
+    :param mode : [str] 'w'(text, utf-8) or 'wb'(binary)
+    """
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    try:
+        with open(tmp, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            yield f
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
 
 colors = [
     '#1f77b4',  # muted blue
@@ -24,21 +64,56 @@ def int2won(x):
     return f'{x}억원' if x < 10000 else f'{str(x)[:-4]}조 {str(x)[-4:]}억원'
 
 def xml2df(url: str) -> pd.DataFrame:
+    """
+    Stream-parse ECOS xml response into DataFrame
+    Rows are decoded straight into column arrays(preallocated by <list_total_count>) and DATA_VALUE is numeric
+    :param url : ECOS api url
+    :return:
+    """
     exclude = ['row', 'P_STAT_CODE']
 
-    resp = requests.get(url)
-    root = ElementTree(fromstring(resp.text)).getroot()
-    data = list()
-    for tag in root.findall('row'):
-        getter = dict()
-        for n, t in enumerate([inner for inner in tag.iter()]):
-            if t.tag in exclude:
-                continue
-            getter.update({t.tag: t.text})
-        data.append(getter)
-
-    return pd.DataFrame(data=data) if data else pd.DataFrame()
+    resp = requests.get(url, stream=True)
+    resp.raw.decode_content = True
+    size, n, data = 0, 0, dict()
+    for _, tag in iterparse(resp.raw, events=('end', )):
+        if tag.tag == 'list_total_count':
+            size = int(tag.text)
+        elif tag.tag == 'row':
+            for t in tag:
+                if t.tag in exclude:
+                    continue
+                if not t.tag in data:
+                    data[t.tag] = np.empty(max(size, n + 1), dtype=object)
+                elif n >= len(data[t.tag]):
+                    data[t.tag] = np.concatenate([data[t.tag], np.empty(len(data[t.tag]), dtype=object)])
+                data[t.tag][n] = t.text
+            tag.clear()
+            n += 1
+    if not n:
+        return pd.DataFrame()
 
+    df = pd.DataFrame(data={k: v[:n] for k, v in data.items()})
+    if 'DATA_VALUE' in df.columns:
+        df['DATA_VALUE'] = pd.to_numeric(df['DATA_VALUE'], errors='coerce')
+    return df
 
 if __name__ == "__main__":
-    print(not np.nan)
\ No newline at end of file
+    from ast import literal_eval
+    import subprocess, sys, os
+
+    # Cold start benchmark: fails(exit 1) if "import snowball" imports a heavy dependency eagerly
+    # or spends more than 0.5s on top of pandas itself
+    heavy = ['pykrx', 'yfinance', 'pandas_datareader', 'plotly', 'scipy', 'stocksymbol']
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    def coldstart(module:str) -> (float, list):
+        code = f"import time, sys; t = time.perf_counter(); import {module}; " \
+               f"print((time.perf_counter() - t, [m for m in {heavy} if m in sys.modules]))"
+        out = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True).stdout
+        return literal_eval(out.strip().split('\n')[-1])
+
+    base = min(coldstart('pandas')[0] for _ in range(3))
+    runs = [coldstart('snowball') for _ in range(3)]
+    elapsed, loaded = min(r[0] for r in runs), runs[0][1]
+    print(f"import pandas: {base:.3f}s / import snowball: {elapsed:.3f}s / heavy modules loaded: {loaded}")
+    if loaded or elapsed - base > 0.5:
+        raise SystemExit(1)
\ No newline at end of file
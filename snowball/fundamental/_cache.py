@@ -0,0 +1,106 @@
+from concurrent.futures import Future
+from collections import OrderedDict
+from snowball.define import atomic
+import requests, threading, hashlib, time, json, os
+
+
+class _httpCache(object):
+    """
+    Process-wide HTTP response cache keyed by URL
+
+      - ttl    : seconds a response is kept
+      - single-flight : concurrent requests of the same URL share one download
+      - maxsize : bytes of response bodies kept in memory, least recently used ones are evicted first
+      - disk   : optional directory to persist responses across processes, empty for memory only
+    Failed requests are never cached, expired responses are purged on every insert.
+    """
+    ttl = 3600
+    maxsize = 64 * 1024 ** 2
+    disk = str()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._memo = OrderedDict()
+        self._size = 0
+        return
+
+    def _purge(self, now:float):
+        """
+        Evict expired and then least recently used responses until maxsize, under lock
+        """
+        for url, (fetched, future, size) in list(self._memo.items()):
+            if future.done() and now - fetched >= self.ttl:
+                self._memo.pop(url)
+                self._size -= size
+        for url, (fetched, future, size) in list(self._memo.items()):
+            if self._size <= self.maxsize:
+                break
+            if future.done():
+                self._memo.pop(url)
+                self._size -= size
+        return
+
+    def _path(self, url:str) -> str:
+        return os.path.join(self.disk, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def _download(self, url:str) -> bytes:
+        if self.disk:
+            path = self._path(url)
+            if os.path.isfile(path) and time.time() - os.path.getmtime(path) < self.ttl:
+                with open(path, 'rb') as f:
+                    return f.read()
+
+        resp = requests.get(url, timeout=30)
+        resp.raise_for_status()
+        if self.disk:
+            with atomic(path, 'wb') as f:
+                f.write(resp.content)
+        return resp.content
+
+    def get(self, url:str) -> bytes:
+        """
+        :param url : [str] URL
+        :return: response body, downloaded at most once per ttl
+        """
+        now = time.time()
+        with self._lock:
+            fetched, future, size = self._memo.get(url, (0, None, 0))
+            owner = future is None or (future.done() and (future.exception() or now - fetched >= self.ttl))
+            if owner:
+                self._size -= size
+                future = Future()
+                self._memo[url] = (now, future, 0)
+            self._memo.move_to_end(url)
+
+        if owner:
+            try:
+                body = self._download(url)
+            except Exception as e:
+                with self._lock:
+                    if self._memo.get(url, (0, None))[1] is future:
+                        self._memo.pop(url)
+                future.set_exception(e)
+            else:
+                with self._lock:
+                    if self._memo.get(url, (0, None))[1] is future:
+                        self._memo[url] = (now, future, len(body))
+                        self._size += len(body)
+                    future.set_result(body)
+                    self._purge(time.time())
+        return future.result()
+
+    def text(self, url:str, encoding:str='utf-8') -> str:
+        return self.get(url).decode(encoding, 'replace')
+
+    def json(self, url:str, **kwargs) -> dict:
+        return json.loads(self.text(url, encoding='utf-8-sig'), **kwargs)
+
+    def clear(self):
+        with self._lock:
+            self._memo.clear()
+            self._size = 0
+        return
+
+
+# Alias
+cache = _httpCache()
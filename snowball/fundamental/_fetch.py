@@ -1,16 +1,94 @@
 from datetime import datetime, timedelta
-from urllib.request import urlopen
-from bs4 import BeautifulSoup as Soup
-from pykrx import stock
-import requests, json
+from functools import lru_cache
+from io import BytesIO, StringIO
+from lxml.html import HTMLParser, parse, tostring
+from snowball.fundamental._cache import cache
+from snowball.define import lazy
 import pandas as pd
 import numpy as np
+import threading, time
+
+stock = lazy('pykrx.stock')
+
+
+class _svdMain(object):
+    """
+    fnguide SVD_Main page of a ticker, downloaded once and parsed by need
+
+    Tables are indexed as pd.read_html(page, header=0) would do(visible <table> with text, in document order),
+    but only the requested ones are converted to DataFrame. pandas drops a table without data(e.g. whitespace only):
+    a table of which any row has two or more cells always has data, emptiness of others is decided by conversion.
+    """
+    _url = "http://comp.fnguide.com/SVO2/ASP/SVD_Main.asp?pGB=1&gicode=A%s&cID=&MenuYn=Y&ReportGB=D&NewMenuID=Y&stkGb=701"
+
+    def __init__(self, ticker:str):
+        self.ticker = ticker
+        self._lock = threading.Lock()
+        self._frames, self._index, self._next = dict(), list(), 0
+        return
+
+    def _convert(self, k:int) -> pd.DataFrame or None:
+        if not k in self._frames:
+            frames = pd.read_html(StringIO(tostring(self.tables[k], encoding='unicode', with_tail=False)), header=0)
+            self._frames[k] = frames[0] if frames else None
+        return self._frames[k]
+
+    def __getitem__(self, n:int) -> pd.DataFrame:
+        with self._lock:
+            tables = self.tables
+            while len(self._index) <= n and self._next < len(tables):
+                visible = lambda e: not 'display:none' in e.attrib.get('style', '').replace(' ', '')
+                rows = filter(visible, tables[self._next].xpath(".//thead/tr|.//tbody//tr|./tr|.//tfoot//tr"))
+                if any(len(list(filter(visible, row.xpath("./td|./th")))) > 1 for row in rows) \
+                        or self._convert(self._next) is not None:
+                    self._index.append(self._next)
+                self._next += 1
+            frame = self._convert(self._index[n])
+        return frame.copy()
+
+    @property
+    def doc(self):
+        if not hasattr(self, '__doc'):
+            doc = parse(BytesIO(cache.get(self._url % self.ticker)), parser=HTMLParser(recover=True)).getroot()
+            self.__setattr__('__doc', doc)
+        return self.__getattribute__('__doc')
+
+    @property
+    def tables(self) -> list:
+        """
+        :return: candidate <table> elements of read_html(visible, any text), empty ones included
+        """
+        if not hasattr(self, '__tables'):
+            tables = self.doc.xpath(
+                "//table[.//text()[re:test(., '.+')]]", namespaces={'re': 'http://exslt.org/regular-expressions'}
+            )
+            self.__setattr__('__tables', [
+                t for t in tables if not 'display:none' in t.attrib.get('style', '').replace(' ', '')
+            ])
+        return self.__getattribute__('__tables')
+
+    @property
+    def summary(self) -> list:
+        """
+        :return: text of each <li> in bizSummaryContent
+        """
+        return [e.text_content() for e in self.doc.xpath("//ul[@id='bizSummaryContent']//li")]
+
+
+@lru_cache(maxsize=32)
+def _main(ticker:str, stamp:int) -> _svdMain:
+    return _svdMain(ticker)
+
+def get_main(ticker:str) -> _svdMain:
+    """
+    Parsed SVD_Main page shared by get_summary and get_statement, renewed along with cache.ttl
+    """
+    return _main(ticker, int(time.time() // cache.ttl))
+
 
 
 def get_summary(ticker:str) -> str:
-    u = "http://comp.fnguide.com/SVO2/ASP/SVD_Main.asp?pGB=1&gicode=A%s&cID=&MenuYn=Y&ReportGB=D&NewMenuID=Y&stkGb=701"
-    html = Soup(requests.get(u % ticker).content, 'lxml').find('ul', id='bizSummaryContent').find_all('li')
-    t = '\n\n '.join([e.text for e in html])
+    t = '\n\n '.join(get_main(ticker).summary)
     w = [
         '.\n' if t[n] == '.' and not all([t[n - 1].isdigit(), t[n + 1].isdigit(), t[n + 1].isalpha()]) else t[n]
         for n in range(1, len(t) - 2)
@@ -19,8 +97,7 @@ def get_summary(ticker:str) -> str:
     return s.replace(' ', '').replace('\xa0\xa0', ' ').replace('\xa0', ' ').replace('\n ', '\n')
 
 def get_statement(ticker:str, **kwargs) -> pd.DataFrame:
-    url = f"http://comp.fnguide.com/SVO2/ASP/SVD_Main.asp?pGB=1&gicode=A{ticker}&cID=&MenuYn=Y&ReportGB=D&NewMenuID=Y&stkGb=701"
-    html = kwargs['html'] if 'html' in kwargs.keys() else pd.read_html(url, header=0)
+    html = kwargs['html'] if 'html' in kwargs.keys() else get_main(ticker)
     by = kwargs['by'] if 'by' in kwargs.keys() else 'annual'
     if by == 'annual':
         s = html[14] if html[11].iloc[0].isnull().sum() > html[14].iloc[0].isnull().sum() else html[11]
@@ -52,7 +129,7 @@ def get_market_cap(ticker:str, todate:str) -> pd.DataFrame:
 
 def get_products(ticker: str) -> pd.DataFrame:
     url = f"http://cdn.fnguide.com/SVO2//json/chart/02/chart_A{ticker}_01_N.json"
-    src = json.loads(urlopen(url=url).read().decode('utf-8-sig', 'replace'), strict=False)
+    src = cache.json(url, strict=False)
     header = pd.DataFrame(src['chart_H'])[['ID', 'NAME']].set_index(keys='ID').to_dict()['NAME']
     header.update({'PRODUCT_DATE': '기말'})
     products = pd.DataFrame(src['chart']).rename(columns=header).set_index(keys='기말')
@@ -75,7 +152,7 @@ def get_products_recent(ticker: str = str(), products: pd.DataFrame = None) -> p
 
 def get_expenses(ticker:str) -> pd.DataFrame:
     url = f"http://comp.fnguide.com/SVO2/ASP/SVD_Corp.asp?pGB=1&gicode=A{ticker}&cID=&MenuYn=Y&ReportGB=&NewMenuID=102&stkGb=701"
-    html = pd.read_html(url, header=0)
+    html = pd.read_html(BytesIO(cache.get(url)), header=0)
 
     sales_cost = html[4].set_index(keys=['항목'])
     sales_cost.index.name = None
@@ -97,7 +174,7 @@ def get_expenses(ticker:str) -> pd.DataFrame:
 
 def get_consensus(ticker:str) -> pd.DataFrame:
     url = f"http://cdn.fnguide.com/SVO2/json/chart/01_02/chart_A{ticker}.json"
-    raw = json.loads(urlopen(url=url).read().decode('utf-8-sig', 'replace'))
+    raw = cache.json(url)
     frm = pd.DataFrame(raw['CHART'])
     frm = frm.rename(columns={'TRD_DT': '날짜', 'VAL1': '투자의견', 'VAL2': '목표주가', 'VAL3': '종가'})
     frm = frm.set_index(keys='날짜')
@@ -111,7 +188,7 @@ def get_foreign_rate(ticker:str) -> pd.DataFrame:
     objs = dict()
     for dt in ['3M', '1Y', '3Y']:
         url = f"http://cdn.fnguide.com/SVO2/json/chart/01_01/chart_A{ticker}_{dt}.json"
-        data = json.loads(urlopen(url=url).read().decode('utf-8-sig', 'replace'))
+        data = cache.json(url)
         frm = pd.DataFrame(data["CHART"])[['TRD_DT', 'J_PRC', 'FRG_RT']]
         frm = frm.rename(columns={'TRD_DT':'날짜', 'J_PRC':'종가', 'FRG_RT':'외국인보유비중'}).set_index(keys='날짜')
         frm.index = pd.to_datetime(frm.index)
@@ -123,7 +200,7 @@ def get_foreign_rate(ticker:str) -> pd.DataFrame:
 
 def get_nps(ticker:str) -> pd.DataFrame:
     url = f"http://cdn.fnguide.com/SVO2/json/chart/05/chart_A{ticker}_D.json"
-    src = json.loads(urlopen(url=url).read().decode('utf-8-sig', 'replace'))
+    src = cache.json(url)
     header = pd.DataFrame(src['01_Y_H'])[['ID', 'NAME']].set_index(keys='ID').to_dict()['NAME']
     header.update({'GS_YM': '날짜'})
     data = pd.DataFrame(src['01_Y']).rename(columns=header)[header.values()].set_index(keys='날짜')
@@ -138,7 +215,7 @@ def get_nps(ticker:str) -> pd.DataFrame:
 
 def get_multi_factor(ticker:str) -> pd.DataFrame:
     url = f"http://cdn.fnguide.com/SVO2/json/chart/05_05/A{ticker}.json"
-    data = json.loads(urlopen(url=url).read().decode('utf-8-sig', 'replace'))
+    data = cache.json(url)
     header = pd.DataFrame(data['CHART_H'])['NAME'].tolist()
     return pd.DataFrame(data['CHART_D']).rename(
         columns=dict(zip(['NM', 'VAL1', 'VAL2'], ['팩터'] + header))
@@ -148,7 +225,7 @@ def get_benchmark_return(ticker:str):
     objs = dict()
     for period in ['3M', '1Y', '3Y']:
         url = f"http://cdn.fnguide.com/SVO2/json/chart/01_01/chart_A{ticker}_{period}.json"
-        data = json.loads(urlopen(url=url).read().decode('utf-8-sig', 'replace'))
+        data = cache.json(url)
         header = pd.DataFrame(data["CHART_H"])[['ID', 'PREF_NAME']]
         header = header[header['PREF_NAME'] != ""]
         inner = pd.DataFrame(data["CHART"])[
@@ -163,7 +240,7 @@ def get_benchmark_return(ticker:str):
 
 def get_benchmark_multiple(ticker:str) -> pd.DataFrame:
     url = f"http://cdn.fnguide.com/SVO2/json/chart/01_04/chart_A{ticker}_D.json"
-    data = json.loads(urlopen(url=url).read().decode('utf-8-sig', 'replace'))
+    data = cache.json(url)
     objs = dict()
     for label, index in (('PER', '02'), ('EV/EBITDA', '03'), ('ROE', '04')):
         header1 = pd.DataFrame(data[f'{index}_H'])[['ID', 'NAME']].set_index(keys='ID')
@@ -180,7 +257,7 @@ def get_benchmark_multiple(ticker:str) -> pd.DataFrame:
 
 def get_short_sell(ticker:str) -> pd.DataFrame:
     url = f"http://cdn.fnguide.com/SVO2/json/chart/11_01/chart_A{ticker}_SELL1Y.json"
-    data = json.loads(urlopen(url=url).read().decode('utf-8-sig', 'replace'))
+    data = cache.json(url)
     frm = pd.DataFrame(data['CHART'])
     frm = frm.rename(columns={'TRD_DT': '날짜', 'VAL': '차입공매도비중', 'ADJ_PRC': '수정종가'}).set_index(keys='날짜')
     frm.index = pd.to_datetime(frm.index)
@@ -190,7 +267,7 @@ def get_short_sell(ticker:str) -> pd.DataFrame:
 
 def get_short_balance(ticker:str) -> pd.DataFrame:
     url = f"http://cdn.fnguide.com/SVO2/json/chart/11_01/chart_A{ticker}_BALANCE1Y.json"
-    data = json.loads(urlopen(url=url).read().decode('utf-8-sig', 'replace'))
+    data = cache.json(url)
     frm = pd.DataFrame(data['CHART'])[['TRD_DT', 'BALANCE_RT', 'ADJ_PRC']]
     frm = frm.rename(columns={'TRD_DT': '날짜', 'BALANCE_RT': '대차잔고비중', 'ADJ_PRC': '수정종가'}).set_index(keys='날짜')
     frm.index = pd.to_datetime(frm.index)
@@ -200,7 +277,7 @@ def get_short_balance(ticker:str) -> pd.DataFrame:
 
 def get_multiple_band(ticker:str) -> (pd.DataFrame, pd.DataFrame):
     url = f"http://cdn.fnguide.com/SVO2/json/chart/01_06/chart_A{ticker}_D.json"
-    src = json.loads(urlopen(url=url).read().decode('utf-8-sig', 'replace'))
+    src = cache.json(url)
     per_header = pd.DataFrame(src['CHART_E'])[['ID', 'NAME']].set_index(keys='ID')
     pbr_header = pd.DataFrame(src['CHART_B'])[['ID', 'NAME']].set_index(keys='ID')
     per_header, pbr_header = per_header.to_dict()['NAME'], pbr_header.to_dict()['NAME']
@@ -221,6 +298,30 @@ def get_multiple_series(ticker:str) -> pd.DataFrame:
 
 
 if __name__ == "__main__":
+    import sys
+
+    # Check: tables of _svdMain equal pd.read_html(page, header=0), on a saved SVD_Main page if given
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'rb') as f:
+            content = f.read()
+    else:
+        content = (
+            '<html><body><table> \n </table><table><tr><td>&nbsp;</td></tr></table><table><caption>c</caption></table>'
+            '<table style="display:none"><tr><td>1</td></tr></table><table><tr><td><span style="display:none">x</span></td></tr></table>'
+            + ''.join(f'<table><tr><th>항목</th><th>{n}</th></tr><tr><td>a</td><td>{n}</td></tr></table>' for n in range(16))
+            + '</body></html>'
+        ).encode('utf-8')
+    get, cache.get = cache.get, lambda url: content
+    full, page = pd.read_html(BytesIO(content), header=0), _svdMain('check')
+    assert all(full[n].equals(page[n]) for n in range(len(full)))
+    try:
+        page[len(full)]
+        raise AssertionError('more tables than read_html')
+    except IndexError:
+        pass
+    print(f'{len(full)} tables equal to read_html out of {len(page.tables)} candidates')
+    cache.get = get
+
     # df1, df2 = get_multiple_band(ticker='005930')
     print(get_benchmark_return('247540'))
     # print(get_benchmark_multiple('012330'))
\ No newline at end of file
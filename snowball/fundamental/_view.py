@@ -1,8 +1,7 @@
 from datetime import datetime
-from plotly.subplots import make_subplots
-from plotly.offline.offline import plot
 from snowball.archive import label
-from snowball.define import colors, int2won
+from snowball.define import colors, int2won, lazy
+from snowball.writer import save
 from snowball.fundamental._fetch import (
     get_summary,
     get_statement,
@@ -20,18 +19,20 @@ from snowball.fundamental._fetch import (
     get_short_sell,
     get_short_balance
 )
-import plotly.graph_objects as go
 import pandas as pd
 import os
 
+go = lazy('plotly.graph_objects')
+subplots = lazy('plotly.subplots')
 
-def _call(fig: go.Figure or make_subplots or str, mode: str, filedir: str):
+
+def _call(fig: 'go.Figure or str', mode: str, filedir: str):
     if mode.startswith('fig'):
         return fig
     elif mode.startswith('show'):
         fig.show()
     elif mode.startswith('save'):
-        plot(fig, filename=filedir, auto_open=False)
+        save(fig, filedir)
     else:
         raise KeyError
     return
@@ -57,7 +58,9 @@ class _summary(object):
 
     @property
     def text(self) -> str:
-        return get_summary(self._p.ticker)
+        if not hasattr(self, '__text'):
+            self.__setattr__('__text', get_summary(self._p.ticker))
+        return self.__getattribute__('__text')
 
 
 class _statement(object):
@@ -129,7 +132,7 @@ class _statement(object):
             hovertemplate=col + ": %{text}<br>" + col[:2] + "비율: %{meta}%<extra></extra>"
         )
 
-    def _bar_profit(self, col:str) -> go.Bar:
+    def _bar_profit(self, col:str) -> 'go.Bar':
         return go.Bar(
             name=col,
             x=self.df.index,
@@ -143,7 +146,7 @@ class _statement(object):
             hovertemplate=col + ": %{text}<extra></extra>"
         )
 
-    def _line_rates(self, col:str) -> go.Scatter:
+    def _line_rates(self, col:str) -> 'go.Scatter':
         return go.Scatter(
             name=col,
             x=self.df.index,
@@ -229,7 +232,7 @@ class _statement(object):
         return
 
     def rates(self, mode:str='show'):
-        fig = make_subplots(
+        fig = subplots.make_subplots(
             rows=2, cols=2,
             vertical_spacing=0.1, horizontal_spacing=0.08,
             x_title='기말', y_title='[%]',
@@ -433,7 +436,7 @@ class _expenses(object):
         self._p = parent
 
     def __call__(self, mode: str = 'show'):
-        fig = make_subplots(
+        fig = subplots.make_subplots(
             rows=2, cols=2,
             subplot_titles=["Profit Rate", "Sales Cost Rate", "Sales and Management Cost Rate", "R&D Investment Rate"],
             x_title="기말",
@@ -549,7 +552,7 @@ class _foreigner(object):
         self._p = parent
 
     def __call__(self, mode:str='show'):
-        fig = make_subplots(
+        fig = subplots.make_subplots(
             rows=1, cols=1,
             x_title='날짜',
             specs=[
@@ -645,7 +648,7 @@ class _multiple(object):
         return
 
     def __call__(self, mode:str='show'):
-        fig = make_subplots(
+        fig = subplots.make_subplots(
             rows=2, cols=2,
             subplot_titles=["PER & EPS", "PBR & BPS", "PER Band", "PBR Band"],
             x_title="날짜",
@@ -821,7 +824,7 @@ class _factors(object):
         return
 
     def __call__(self, mode:str='show'):
-        fig = make_subplots(
+        fig = subplots.make_subplots(
             rows=2, cols=2,
             subplot_titles=[None, 'PER', 'EV/EBITDA', 'ROE'],
             x_title='기말',
@@ -860,7 +863,7 @@ class _factors(object):
             self.__setattr__('__df', (dff, dfm))
         return self.__getattribute__('__df')
 
-    def _polar(self, col:str) -> go.Scatterpolar or None:
+    def _polar(self, col:str) -> 'go.Scatterpolar or None':
         df, _ = self.df
         return go.Scatterpolar(
             name=col,
@@ -872,7 +875,7 @@ class _factors(object):
             hovertemplate=col + '<br>%{theta} : %{r}<extra></extra>'
         )
 
-    def _bar(self, c1:str, c2:str) -> go.Bar or None:
+    def _bar(self, c1:str, c2:str) -> 'go.Bar or None':
         _, df = self.df
         n = df.columns.tolist().index((c1, c2)) % 3
         return go.Bar(
@@ -897,7 +900,7 @@ class _short(object):
         return
 
     def __call__(self, mode:str='show'):
-        fig = make_subplots(
+        fig = subplots.make_subplots(
             rows=1, cols=1,
             specs=[[{'secondary_y': True}]]
         )
@@ -1,4 +1,15 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from contextlib import nullcontext
 from snowball.timeseries import TimeSeries
+from snowball.fundamental._fetch import (
+    get_statement,
+    get_multiple_band,
+    get_multi_factor,
+    get_benchmark_multiple,
+    get_short_sell,
+    get_short_balance
+)
 from snowball.fundamental._view import (
     _summary,
     _statement,
@@ -12,9 +23,23 @@ from snowball.fundamental._view import (
     _factors,
     _short
 )
+from snowball.writer import writer
+from tqdm import tqdm
+import pandas as pd
+import time, os
 
 
 class KrseStock(TimeSeries):
+    reports = ('summary', 'statement', 'marketcap', 'products', 'expenses', 'consensus', 'foreigner', 'multiples',
+               'benchmark', 'factors', 'short')
+
+    # Prefetch sources of each report, if other than the report itself, see prefetch()
+    sources = dict(
+        statement=('statement(annual)', ),
+        multiples=('multiples', 'multiple band', 'ohlcv'),
+        factors=('factors', 'multi factor', 'benchmark multiple'),
+        short=('short', 'short sell', 'short balance', 'ohlcv'),
+    )
 
     def __init__(self, ticker:str):
         super().__init__(ticker=ticker)
@@ -119,6 +144,131 @@ class KrseStock(TimeSeries):
         self.short = _short(self)
         return
 
+    def prefetch(self, workers:int=8) -> dict:
+        """
+        Fetch price data and every source of components concurrently and fill each component's cache,
+        so that rendering afterwards makes no network call
+        :param workers : [int] maximum number of threads
+        :return: {source: exception} of failed ones, empty if all succeeded
+        """
+        def statement(by:str):
+            self.statement.__setattr__(f'__{by}', get_statement(self.ticker, by=by))
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        ohlcv = executor.submit(lambda: self.ohlcv)
+        jobs = {
+            'summary': lambda: self.summary.text,
+            'statement(annual)': lambda: statement('annual'),
+            'statement(quarter)': lambda: statement('quarter'),
+            'marketcap': lambda: self.marketcap.df,
+            'products': lambda: self.products.df,
+            'expenses': lambda: self.expenses.df,
+            'consensus': lambda: self.consensus.df,
+            'foreigner': lambda: self.foreigner.df,
+            'multiples': lambda: self.multiples.df,
+            'benchmark': lambda: self.benchmark.df,
+            'factors': lambda: self.factors.df,
+            'short': lambda: (ohlcv.result(), self.short.df),  # waits on the price data it reads, never loads it twice
+
+            # Sources of components made of two or more; fetched alongside so that such component waits
+            # on its slowest source only(shared through response cache)
+            'multiple band': lambda: get_multiple_band(self.ticker),
+            'multi factor': lambda: get_multi_factor(self.ticker),
+            'benchmark multiple': lambda: get_benchmark_multiple(self.ticker),
+            'short sell': lambda: get_short_sell(self.ticker),
+            'short balance': lambda: get_short_balance(self.ticker),
+        }
+        with executor:
+            futures = dict(ohlcv=ohlcv, **{name: executor.submit(job) for name, job in jobs.items()})
+        failed = {name: future.exception() for name, future in futures.items() if future.exception() is not None}
+        for name, e in failed.items():
+            print(f"\t- Failed fetching {name} of {self.ticker}: {e}")
+        return failed
+
+    @classmethod
+    def report(cls, tickers:list, root:str, workers:int=4, processes:int=None, html:str='shared') -> pd.DataFrame:
+        """
+        Save every report of many tickers under root/{ticker} {name}
+        Sources are fetched on threads(I/O), figures are built and written on processes(CPU) as soon as fetched,
+        a failure of one ticker or one report never stops the others. Reports of which source failed to prefetch
+        are skipped, not retried on rendering processes
+        :param tickers   : [list] tickers
+        :param root      : [str] output directory
+        :param workers   : [int] number of tickers fetched at once(each prefetch uses its own threads)
+        :param processes : [int] number of rendering processes, default number of CPUs
+        :param html      : [str] 'shared'(one plotly.js under root), 'single'(one document per ticker) or 'standalone'
+        :return: pd.DataFrame of name, fetch[s], render[s], error by ticker
+        """
+        if not html in ('shared', 'single', 'standalone'):
+            raise ValueError(f"html must be 'shared', 'single' or 'standalone', not {html!r}")
+        summary = pd.DataFrame(index=pd.Index(tickers, name='ticker'), columns=['name', 'fetch', 'render', 'error'])
+        summary[['fetch', 'render']] = summary[['fetch', 'render']].astype(float)
+
+        def fetch(ticker:str):
+            tic = time.perf_counter()
+            stock = cls(ticker=ticker)
+            stock.path = os.path.join(root, f'{ticker} {stock.name}')
+            failed = stock.prefetch()
+            return stock, time.perf_counter() - tic, failed
+
+        with ThreadPoolExecutor(max_workers=workers) as threads, \
+             ProcessPoolExecutor(max_workers=processes, mp_context=get_context('spawn')) as pool:
+            fetches, renders = {threads.submit(fetch, ticker): ticker for ticker in tickers}, dict()
+            for job in tqdm(as_completed(fetches), total=len(fetches), desc='Fetch Reports'):
+                ticker = fetches[job]
+                if job.exception() is not None:
+                    summary.loc[ticker, 'error'] = repr(job.exception())
+                    continue
+                stock, elapsed, failed = job.result()
+                summary.loc[ticker, ['name', 'fetch']] = [stock.name, elapsed]
+                if failed:
+                    summary.loc[ticker, 'error'] = '; '.join(f'{name}: {e!r}' for name, e in failed.items())
+                skip = tuple(
+                    name for name in stock.reports if any(src in failed for src in cls.sources.get(name, (name, )))
+                )
+                if len(skip) == len(stock.reports):
+                    continue
+                target = {'shared': root, 'single': os.path.join(stock.path, 'report.html')}.get(html)
+                renders[pool.submit(_render, stock, target, skip)] = ticker
+
+            for job in tqdm(as_completed(renders), total=len(renders), desc='Render Reports'):
+                ticker = renders[job]
+                error = summary.loc[ticker, 'error']
+                errors = [error] if isinstance(error, str) else list()
+                if job.exception() is not None:
+                    summary.loc[ticker, 'error'] = '; '.join(errors + [repr(job.exception())])
+                    continue
+                elapsed, failed = job.result()
+                summary.loc[ticker, 'render'] = elapsed
+                if failed:
+                    summary.loc[ticker, 'error'] = '; '.join(errors + [f'{name}: {e}' for name, e in failed.items()])
+
+        for ticker, error in summary['error'].dropna().items():
+            print(f"\t- Failed reporting {ticker}: {error}")
+        print(f"Reported {summary['error'].isna().sum()} / {len(summary)} tickers, "
+              f"fetch {summary['fetch'].sum():.1f}s, render {summary['render'].sum():.1f}s in total")
+        return summary
+
+
+def _render(stock:KrseStock, target:str=None, skip:tuple=()) -> (float, dict):
+    """
+    Save every report of a prefetched stock, run on rendering process of KrseStock.report
+    :param target : [str] path of snowball.writer, None for standalone files
+    :param skip   : [tuple] reports not to save(e.g. of which source failed)
+    :return: elapsed seconds, {report: error} of failed ones
+    """
+    tic, failed = time.perf_counter(), dict()
+    with writer(target) if target else nullcontext():
+        for name in stock.reports:
+            if name in skip:
+                continue
+            # noinspection PyBroadException
+            try:
+                getattr(stock, name)('save')
+            except Exception as e:
+                failed[name] = repr(e)
+    return time.perf_counter() - tic, failed
+
 
 if __name__ == "__main__":
 
@@ -1 +1,2 @@
-from snowball.timeseries.api import TimeSeries
\ No newline at end of file
+from snowball.timeseries.api import TimeSeries
+from snowball.timeseries._panel import PricePanel
\ No newline at end of file
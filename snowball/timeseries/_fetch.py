@@ -1,40 +1,75 @@
 from datetime import datetime, timedelta
 from pytz import timezone
-from pykrx.stock import (
-    get_index_ohlcv_by_date,
-    get_market_ohlcv_by_date,
-    get_index_ticker_name
-)
-from pandas_datareader import get_data_fred
-from snowball.archive import symbols, label
-from snowball.define import xml2df
+from snowball.archive import symbols, label, store
+from snowball.define import xml2df, lazy
 import pandas as pd
-import yfinance as yf
+import threading
 
+stock = lazy('pykrx.stock')
+yf = lazy('yfinance')
+web = lazy('pandas_datareader')
 
-def krx(ticker:str, prev:datetime, curr:datetime):
-    fetch = get_index_ohlcv_by_date(
+
+# Concurrent fetch limit per source, shared by every _fetch instance
+limits = {
+    'krx': threading.BoundedSemaphore(4),
+    'krse': threading.BoundedSemaphore(4),
+    'ecos': threading.BoundedSemaphore(2),
+    'nyse': threading.BoundedSemaphore(4),
+    'fred': threading.BoundedSemaphore(2),
+}
+
+
+def limited(market:str, fetch):
+    """
+    :param market : [str] source market, key of limits
+    :param fetch  : [callable] fetch(prev, curr)
+    :return: fetch bounded by per-source concurrency limit
+    """
+    def _limited(prev:datetime, curr:datetime):
+        with limits[market]:
+            return fetch(prev, curr)
+    return _limited
+
+
+def repair(fetch:pd.DataFrame, clear:bool=False) -> (pd.DataFrame, pd.DatetimeIndex):
+    """
+    Repair trade-halt bars(시가 == 0) with masks: 시가, 고가, 저가 are filled with 종가
+    :param fetch : [pd.DataFrame] OHLCV
+    :param clear : [bool] if True, other columns(거래량, 거래대금, ...) of halted bars are set to 0
+    :return: repaired OHLCV, index of repaired bars
+    """
+    halt = (fetch['시가'] == 0).values
+    if not halt.any():
+        return fetch, fetch.index[halt]
+
+    fetch = fetch.copy()
+    for col in ['시가', '고가', '저가']:
+        fetch[col] = fetch[col].where(~halt, fetch['종가'])
+    if clear:
+        for col in [c for c in fetch.columns if not c in ['시가', '고가', '저가', '종가']]:
+            fetch[col] = fetch[col].where(~halt, 0)
+    return fetch, fetch.index[halt]
+
+
+def krx(ticker:str, prev:datetime, curr:datetime, report:bool=False):
+    fetch = stock.get_index_ohlcv_by_date(
         fromdate=prev.strftime("%Y%m%d"),
         todate=curr.strftime("%Y%m%d"),
         ticker=ticker
     )
-    return fetch.apply(
-        lambda x: pd.Series(
-            data=[x.종가, x.종가, x.종가, x.종가, 0, 0, 0], index=x.index
-        ) if x.시가 == 0 else x, axis=1
-    )
+    fetch, repaired = repair(fetch, clear=True)
+    return (fetch, repaired) if report else fetch
 
 
-def krse(ticker:str, prev:datetime, curr:datetime):
-    fetch = get_market_ohlcv_by_date(
+def krse(ticker:str, prev:datetime, curr:datetime, report:bool=False):
+    fetch = stock.get_market_ohlcv_by_date(
         fromdate=prev.strftime("%Y%m%d"),
         todate=curr.strftime("%Y%m%d"),
         ticker=ticker
     )
-    trade_stop = fetch[fetch.시가 == 0].copy()
-    if not trade_stop.empty:
-        fetch.loc[trade_stop.index, ['시가', '고가', '저가']] = trade_stop['종가']
-    return fetch
+    fetch, repaired = repair(fetch)
+    return (fetch, repaired) if report else fetch
 
 
 def ecos(symbol:str, label:str, prev:datetime, curr:datetime) -> pd.Series:
@@ -49,6 +84,9 @@ def ecos(symbol:str, label:str, prev:datetime, curr:datetime) -> pd.Series:
 
     api = "CEW3KQU603E6GA8VX0O9"
     name, code, c, s, e, _ = tuple(key.values[0])
+    form = {'D': "%Y%m%d", 'M': "%Y%m", 'A': "%Y", 'Y': "%Y"}
+    if c in form:
+        s = max(s, prev.strftime(form[c]))
     url = f'http://ecos.bok.or.kr/api/StatisticSearch/{api}/xml/kr/1/100000/{symbol}/{c}/{s}/{e}/{code}'
     fetch = xml2df(url=url)
     tseries = pd.Series(
@@ -61,22 +99,116 @@ def ecos(symbol:str, label:str, prev:datetime, curr:datetime) -> pd.Series:
     return tseries[tseries.index >= prev.strftime("%Y-%m-%d")]
 
 
-def nyse(ticker:str, period:int) -> pd.DataFrame:
+def nyse(ticker:str, prev:datetime, curr:datetime) -> pd.DataFrame:
     o_names = ['Open', 'High', 'Low', 'Close', 'Volume']
     c_names = ['시가', '고가', '저가', '종가', '거래량']
-    ohlcv = yf.Ticker(ticker).history(period=f'{period}y')[o_names]
+    ohlcv = yf.Ticker(ticker).history(
+        start=prev.strftime("%Y-%m-%d"),
+        end=(curr + timedelta(1)).strftime("%Y-%m-%d")
+    )[o_names]
     ohlcv.index.name = '날짜'
     return ohlcv.rename(columns=dict(zip(o_names, c_names)))
 
 
 def fred(symbol: str, prev:datetime, curr:datetime) -> pd.Series:
-    fetch = get_data_fred(symbols=symbol, start=prev, end=curr)
+    fetch = web.get_data_fred(symbols=symbol, start=prev, end=curr)
     return pd.Series(name=symbol, dtype=float, index=fetch.index, data=fetch[symbol])
 
 
+def compact(df:pd.DataFrame or pd.Series, dates:bool=False) -> pd.DataFrame or pd.Series:
+    """
+    Compact dtype of time-series: integral prices to int32, other prices to float32,
+    integral volumes(거래량, 거래대금, ...) to the smallest safe integer, other columns kept in float64
+    since float32 rounds large values(e.g. 거래대금 of 1e12)
+    :param df    : OHLCV or time-series
+    :param dates : [bool] if True, index is encoded as int32 days since 1970-01-01
+    :return: compacted time-series, see expand()
+    """
+    if isinstance(df, pd.Series):
+        return compact(df.to_frame(), dates=dates).iloc[:, 0].rename(df.name)
+
+    df = df.copy()
+    for col in df.columns:
+        v = df[col]
+        if not pd.api.types.is_numeric_dtype(v):
+            continue
+        integral = pd.api.types.is_integer_dtype(v) or (v.notna().all() and (v % 1 == 0).all())
+        if col in ['시가', '고가', '저가', '종가']:
+            fits = integral and v.abs().max() < 2 ** 31
+            df[col] = v.astype('int32') if fits else v.astype('float32')
+        elif integral and v.notna().all():
+            df[col] = pd.to_numeric(v.astype('int64'), downcast='integer')
+        else:
+            df[col] = v.astype('float64')
+    if dates:
+        days = (df.index.tz_localize(None) if df.index.tz else df.index).values.astype('datetime64[D]')
+        df.index = pd.Index(days.astype('int32'), name=df.index.name)
+    return df
+
+
+def expand(df:pd.DataFrame or pd.Series) -> pd.DataFrame or pd.Series:
+    """
+    Restore compacted time-series to int64 / float64 and DatetimeIndex, exact for every integral data
+    :param df : compacted time-series, see compact()
+    :return:
+    """
+    df = df.copy()
+    if pd.api.types.is_integer_dtype(df.index):
+        days = df.index.values.astype('datetime64[D]')
+        df.index = pd.DatetimeIndex(days.astype('datetime64[ns]'), name=df.index.name)
+    if isinstance(df, pd.Series):
+        return df.astype('int64' if pd.api.types.is_integer_dtype(df) else 'float64')
+    for col in df.columns:
+        if pd.api.types.is_integer_dtype(df[col]):
+            df[col] = df[col].astype('int64')
+        elif pd.api.types.is_float_dtype(df[col]):
+            df[col] = df[col].astype('float64')
+    return df
+
+
 class _fetch(label):
     __p = 20
     __d = datetime.now(timezone('Asia/Seoul')).date()
+    __c = False
+
+    # Derived data and its base data: evicting a base evicts every derived data on it
+    _depends = {
+        'ohlcv': (),
+        'isohlcv': ('ohlcv', ),
+    }
+
+    def _memo(self, name:str, compute, **params):
+        """
+        Cache derived data keyed by (ticker, enddate, period, name, params)
+        :param name   : [str] name of derived data, key of _depends
+        :param compute: [callable] compute(**params)
+        :return: cached data
+        """
+        if not hasattr(self, '__memo'):
+            self.__setattr__('__memo', dict())
+        memo = self.__getattribute__('__memo')
+        key = (self.ticker, self.enddate, self.period, name, tuple(sorted(params.items())))
+        if not key in memo:
+            memo[key] = compute(**params)
+        return memo[key]
+
+    def evict(self, name:str='ohlcv'):
+        """
+        Evict cached data and every derived data depending on it
+        :param name : [str] name of data, key of _depends
+        """
+        names, queue = {name}, [name]
+        while queue:
+            base = queue.pop()
+            for derived, bases in self._depends.items():
+                if base in bases and not derived in names:
+                    names.add(derived)
+                    queue.append(derived)
+        if hasattr(self, '__memo'):
+            memo = self.__getattribute__('__memo')
+            for key in [key for key in memo if key[3] in names]:
+                memo.pop(key)
+        return
 
     @property
     def dtype(self) -> str:
@@ -94,6 +226,7 @@ class _fetch(label):
 
     @enddate.setter
     def enddate(self, enddate:str):
+        self.evict()
         self.__d = datetime.strptime(enddate, "%Y%m%d")
 
     @property
@@ -102,40 +235,93 @@ class _fetch(label):
 
     @period.setter
     def period(self, period:int or float):
+        self.evict()
         self.__p = period
 
+    @property
+    def compact(self) -> bool:
+        """
+        Opt-in compact dtype of ohlcv(int32 / float32 prices, smallest volume integer), see compact()
+        """
+        return self.__c
+
+    @compact.setter
+    def compact(self, compact:bool):
+        self.evict()
+        self.__c = compact
+
     @property
     def ohlcv(self) -> pd.DataFrame:
-        if not self.isohlcv():
-            df = pd.DataFrame(columns=['시가', '고가', '저가', '종가', '거래량'])
-            df['종가'] = self._fetch()
-            return df
-        return self._fetch()
+        def _ohlcv():
+            if not self.isohlcv():
+                df = pd.DataFrame(columns=['시가', '고가', '저가', '종가', '거래량'])
+                df['종가'] = self._fetch()
+                return df
+            return self._fetch()
+        return self._memo('ohlcv', _ohlcv)
     
     @property
     def close(self) -> pd.Series:
         return self.ohlcv.종가
 
     def isohlcv(self) -> bool:
-        df = self._fetch()
-        return not (isinstance(df, pd.Series) and not isinstance(df, pd.DataFrame))
+        def _isohlcv():
+            df = self._fetch()
+            return not (isinstance(df, pd.Series) and not isinstance(df, pd.DataFrame))
+        return self._memo('isohlcv', _isohlcv)
+
+    @property
+    def _key(self) -> str:
+        return store.key(self.ticker, self.label) if self.market == 'ecos' else store.key(self.ticker)
 
     def _fetch(self) -> pd.DataFrame or pd.Series:
         curr = self.__d
         prev = curr - timedelta(self.period * 365)
 
-        attr = f'__ohlcv{self.enddate}{self.period}'
+        attr = f'__ohlcv{self.enddate}{self.period}{"c" if self.compact else ""}'
         if not hasattr(self, attr):
             if self.market == 'krx':
-                self.__setattr__(attr, krx(self.ticker, prev=prev, curr=curr))
+                fetch = lambda p, c: krx(self.ticker, prev=p, curr=c)
             elif self.market == 'krse':
-                self.__setattr__(attr, krse(self.ticker, prev=prev, curr=curr))
+                fetch = lambda p, c: krse(self.ticker, prev=p, curr=c)
             elif self.market == 'ecos':
                 if not self.label:
                     raise KeyError("Label missing")
-                self.__setattr__(attr, ecos(self.ticker, self.label, prev=prev, curr=curr))
+                fetch = lambda p, c: ecos(self.ticker, self.label, prev=p, curr=c)
             elif self.market == 'nyse':
-                self.__setattr__(attr, nyse(self.ticker, self.period))
+                fetch = lambda p, c: nyse(self.ticker, prev=p, curr=c)
             else:
-                self.__setattr__(attr, fred(self.ticker,prev=prev, curr=curr))
-        return self.__getattribute__(attr)
\ No newline at end of file
+                fetch = lambda p, c: fred(self.ticker, prev=p, curr=c)
+            data = store.load(self.market, self._key, prev=prev, curr=curr, fetch=limited(self.market, fetch))
+            self.__setattr__(attr, compact(data) if self.compact else data)
+        return self.__getattribute__(attr)
+
+
+if __name__ == "__main__":
+    import numpy as np
+    import timeit
+
+    # Benchmark: vectorized repair vs. previous row-wise apply on synthetic 5,000-bar index frame
+    n = 5000
+    rand = np.random.default_rng(0)
+    c = 1000 + rand.standard_normal(n).cumsum()
+    sample = pd.DataFrame(
+        data={
+            '시가': c, '고가': c + 5, '저가': c - 5, '종가': c,
+            '거래량': rand.integers(1, 10 ** 6, n), '거래대금': rand.integers(1, 10 ** 9, n),
+            '상장시가총액': rand.integers(1, 10 ** 12, n)
+        },
+        index=pd.bdate_range(end='2023-03-09', periods=n, name='날짜')
+    )
+    sample.loc[rand.choice(sample.index, 250, replace=False), '시가'] = 0
+
+    rowwise = lambda: sample.apply(
+        lambda x: pd.Series(data=[x.종가, x.종가, x.종가, x.종가, 0, 0, 0], index=x.index) if x.시가 == 0 else x,
+        axis=1
+    )
+    vectorized = lambda: repair(sample, clear=True)
+
+    assert np.allclose(rowwise().values.astype(float), vectorized()[0].values.astype(float))
+    t_row, t_vec = timeit.timeit(rowwise, number=3) / 3, timeit.timeit(vectorized, number=3) / 3
+    print(f"row-wise  : {1000 * t_row:.2f} ms")
+    print(f"vectorized: {1000 * t_vec:.2f} ms (x{t_row / t_vec:.0f}), repaired {len(vectorized()[1])} bars")
@@ -1,9 +1,14 @@
 from datetime import timedelta, datetime
-from scipy.stats import linregress
 from snowball.timeseries._fetch import _fetch
+from snowball.timeseries._state import _state
+from snowball.archive import store
+from snowball.define import lazy
 import pandas as pd
 import numpy as np
 import warnings
+
+stats = lazy('scipy.stats')
+
 warnings.simplefilter(action='ignore', category=FutureWarning)
 np.seterr(divide='ignore', invalid='ignore')
 
@@ -17,13 +22,59 @@ def fit(series:pd.Series) -> pd.Series or pd.DataFrame:
 
     x = (data.Time.diff()).dt.days.fillna(1).astype(int).cumsum()
     y = data.Data
-    s, i, _, _, _ = linregress(x=x, y=y)
+    s, i, _, _, _ = stats.linregress(x=x, y=y)
     regression = s * x + i
     regression.name = 'Regression'
     _ = pd.concat(objs=[data, regression], axis=1)
     return _[['Time', 'Regression']].set_index(keys='Time')
 
 
+def fits(series:pd.Series, starts:dict) -> pd.DataFrame:
+    """
+    Linear regressions of every window ending at the last data, in one pass from cumulative sums of x, y, xy, x²
+    :param series : Time-series(index datetime) 1D data
+    :param starts : {label: integer location where each window starts}
+    :return: regression data(NaN out of window) by label
+    """
+    x = (series.index - series.index[-1]).days.values.astype(float)  # centered at the last data for precision
+    y = series.values.astype(float)
+    n, i = len(y), np.array(list(starts.values()), dtype=int)
+
+    cum = np.zeros((4, n + 1))
+    cum[:, 1:] = np.cumsum([x, y, x * y, x * x], axis=1)
+    sx, sy, sxy, sxx = cum[:, -1:] - cum[:, i]
+    m = (n - i).astype(float)
+    slope = (m * sxy - sx * sy) / (m * sxx - sx * sx)
+    intercept = (sy - slope * sx) / m
+
+    regression = slope * x[:, None] + intercept
+    regression[np.arange(n)[:, None] < i] = np.nan
+    return pd.DataFrame(data=regression, index=pd.Index(series.index, name='Time'), columns=list(starts.keys()))
+
+
+def rolling_fit(series:pd.Series, window:int) -> pd.DataFrame:
+    """
+    Linear regression of trailing window on every date, in O(n) from sliding sums of x, y, xy, x², y²
+    :param series : Time-series(index datetime) 1D data
+    :param window : [int] number of data in each regression
+    :return: slope(per day), intercept(value at each date), R² by date
+    """
+    x = (series.index - series.index[0]).days.values.astype(float)
+    y = series.values.astype(float)
+
+    cum = np.zeros((5, len(y) + 1))
+    cum[:, 1:] = np.cumsum([x, y, x * y, x * x, y * y], axis=1)
+    sx, sy, sxy, sxx, syy = cum[:, window:] - cum[:, :-window]
+
+    cxx, cxy, cyy = window * sxx - sx * sx, window * sxy - sx * sy, window * syy - sy * sy
+    slope = cxy / cxx
+    intercept = (sy + slope * (window * x[window - 1:] - sx)) / window
+
+    data = np.full((len(y), 3), np.nan)
+    data[window - 1:] = np.column_stack([slope, intercept, cxy * cxy / (cxx * cyy)])
+    return pd.DataFrame(data=data, index=pd.Index(series.index, name='Time'), columns=['slope', 'intercept', 'r2'])
+
+
 def tip2tip(series:pd.Series, top_bottom:str, limit_far:int=5) -> pd.Series:
     """
     Used to determine support or resistant line
@@ -92,6 +143,109 @@ def tip2tip(series:pd.Series, top_bottom:str, limit_far:int=5) -> pd.Series:
     # l_error = math.sqrt((l_regress - price[key]).pow(2).sum())
     # return r_regress if r_error < l_error else l_regress
 
+def relative(close:pd.Series or pd.DataFrame, windows:dict=None) -> pd.DataFrame:
+    """
+    Relative return of each window ending at the last valid date(of each ticker for panel), start normalized with 0%
+    Filled closes are computed once and each window is derived by division by its start, which equals the
+    compounded pct_change of the window for any series, including those of zero or negative values(e.g. 경상수지)
+    :param close   : Time-series(index datetime) close price, or panel of close prices(columns by ticker)
+    :param windows : {label: days}, default 3M / 6M / 1Y / 2Y / 3Y / 5Y
+    :return: columns by label, or (label, ticker) for panel
+    """
+    if windows is None:
+        windows = {'3M': 92, '6M': 183, '1Y': 365, '2Y': 730, '3Y': 1095, '5Y': 1825}
+    panel = close if isinstance(close, pd.DataFrame) else close.to_frame()
+    filled = panel.ffill().values.astype(float)
+    base = panel.bfill().values.astype(float)  # first valid data at or after each date
+    valid = panel.notna().values
+    last = len(panel) - 1 - valid[::-1].argmax(axis=0)
+    rows, cols = np.arange(len(panel))[:, None], np.arange(panel.shape[1])
+
+    objs, starts = dict(), list()
+    for label, days in windows.items():
+        i = panel.index.searchsorted(panel.index[last] - timedelta(days))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ret = 100 * (filled / base[i, cols] - 1)
+        ret[(rows < i) | (rows > last)] = np.nan
+        objs[label] = pd.DataFrame(data=ret, index=panel.index, columns=panel.columns)
+        starts.append(i.min())
+    df = pd.concat(objs=objs, axis=1).iloc[min(starts):]
+    return df if isinstance(close, pd.DataFrame) else df.droplevel(1, axis=1)
+
+
+def hull(x:np.ndarray, y:np.ndarray, upper:bool) -> list:
+    """
+    Upper or lower convex hull by monotone chain, O(n) since x is already sorted
+    :param x     : ascending 1D data
+    :param y     : 1D data
+    :param upper : [bool] True for upper hull, False for lower hull
+    :return: integer locations of hull vertices
+    """
+    vertex = list()
+    for k in range(len(x)):
+        while len(vertex) >= 2:
+            i, j = vertex[-2], vertex[-1]
+            cross = (x[j] - x[i]) * (y[k] - y[i]) - (y[j] - y[i]) * (x[k] - x[i])
+            if (cross >= 0) if upper else (cross <= 0):
+                vertex.pop()
+            else:
+                break
+        vertex.append(k)
+    return vertex
+
+
+def bounds(series:pd.Series, top_bottom:str, limit_far:int=5, tolerance:float=0.01) -> pd.DataFrame:
+    """
+    Support or resistant line candidates from edges of convex hull, sorted by touch count
+    :param series     : Time-series data
+    :param top_bottom : [str] 'top' for resist line candidates, 'bottom' for support line candidates
+    :param limit_far  : [int] minimum days between two tips of a line
+    :param tolerance  : [float] relative distance to the line counted as a touch
+    :return: pd.DataFrame of candidates with columns
+      - slope, intercept : line value = slope * (days from the first date of series) + intercept
+      - touch            : number of data on the line within tolerance
+      - start, end       : dates of two tips
+    """
+    series = series.dropna()
+    x = (series.index - series.index[0]).days.values.astype(float)
+    y = series.values.astype(float)
+    vertex = np.array(hull(x, y, upper=top_bottom == 'top'))
+    i, j = vertex[:-1], vertex[1:]
+    i, j = i[(x[j] - x[i]) >= limit_far], j[(x[j] - x[i]) >= limit_far]
+
+    slope = (y[j] - y[i]) / (x[j] - x[i])
+    intercept = y[i] - slope * x[i]
+    line = slope * x[:, None] + intercept
+    gap = (y[:, None] - line) if top_bottom == 'top' else (line - y[:, None])
+    touch = (gap >= -tolerance * np.abs(line)).sum(axis=0)
+
+    df = pd.DataFrame(data=dict(
+        slope=slope, intercept=intercept, touch=touch, start=series.index[i], end=series.index[j]
+    ))
+    return df.sort_values(by=['touch', 'end'], ascending=False, ignore_index=True)
+
+
+def bound(data:pd.Series or pd.DataFrame, top_bottom:str, limit_far:int=5, tolerance:float=0.01) -> pd.Series or pd.DataFrame:
+    """
+    Support or resistant line of the most touched convex hull edge
+    :param data       : Time-series data, or panel of time-series(columns by ticker)
+    :param top_bottom : [str] 'top' to find resist line, 'bottom' to find support line
+    :param limit_far  : [int] minimum days between two tips of a line
+    :param tolerance  : [float] relative distance to the line counted as a touch
+    :return: Time-series data, or panel of time-series
+    """
+    if isinstance(data, pd.DataFrame):
+        return pd.concat(objs={c: bound(data[c], top_bottom, limit_far, tolerance) for c in data.columns}, axis=1)
+
+    if data.notna().sum() < 2:
+        return pd.Series(name=data.name, index=data.index, dtype=float)
+    line = bounds(data, top_bottom, limit_far, tolerance)
+    x = pd.Series(data=(data.index - data.dropna().index[0]).days, index=data.index, dtype=float)
+    if line.empty:
+        return pd.Series(name=data.name, index=data.index, dtype=float)
+    return (line.slope[0] * x + line.intercept[0]).rename(data.name)
+
+
 # def delimit(price:pd.DataFrame, key:str) -> pd.Series:
 #     tip_v = price[key].max() if key == '고가' else price[key].min()
 #     tip = price[price[key] == tip_v]
@@ -130,25 +284,77 @@ def tip2tip(series:pd.Series, top_bottom:str, limit_far:int=5) -> pd.Series:
 
 class _handle(_fetch):
 
+    _depends = dict(
+        _fetch._depends,
+        typical=('ohlcv', ),
+        max52w=('ohlcv', ),
+        min52w=('ohlcv', ),
+        ma=('ohlcv', ),
+        relreturn=('ohlcv', ),
+        trendline=('typical', ),
+        trendstrength=('trendline', ),
+        rolling_trend=('typical', ),
+        boundline=('ohlcv', 'typical'),
+        state=('ohlcv', ),
+    )
+
+    @property
+    def state(self) -> _state:
+        """
+        Incremental indicator state persisted next to stored price data(store), see _state
+        Only bars later than the persisted state are advanced; ALL / Half / Quarter trend windows cover every
+        bar the state has been advanced with. State is rebuilt if its last bar differs from the price data.
+        If enddate is earlier than the persisted state, state is built from the price data without persisting.
+        Dates are compared in local(tz-naive) date of bars, e.g. nyse of yfinance.
+        """
+        def _load():
+            path = f'{store.path(self.market, self._key)}.state.npz'
+            ohlcv = self.ohlcv.tz_localize(None) if getattr(self.ohlcv.index, 'tz', None) else self.ohlcv
+            state, close = _state.load(path), ohlcv['종가'].dropna()
+            if len(state) and len(close) and close.index[-1] < state.date:
+                return _state().advance(ohlcv)
+
+            n = len(state)
+            if n and not (state.date in close.index and np.isclose(close[state.date], state.close[-1], equal_nan=True)):
+                state, n = _state(), -1
+            state.advance(ohlcv)
+            if len(state) != n:
+                state.save(path)
+            return state
+        return self._memo('state', _load)
+
     @property
     def typical(self) -> pd.Series:
-        return (self.ohlcv.고가 + self.ohlcv.저가 + self.ohlcv.종가)/3 if self.isohlcv() else self.close
+        return self._memo(
+            'typical',
+            lambda: (self.ohlcv.고가 + self.ohlcv.저가 + self.ohlcv.종가)/3 if self.isohlcv() else self.close
+        )
 
     @property
     def max52w(self) -> int or float:
         if self.ohlcv.empty:
             return None
-        return self.ohlcv[self.ohlcv.index >= (self.ohlcv.index[-1] - timedelta(365))].max()['종가']
+        return self._memo(
+            'max52w',
+            lambda: self.ohlcv[self.ohlcv.index >= (self.ohlcv.index[-1] - timedelta(365))].max()['종가']
+        )
 
     @property
     def min52w(self) -> int or float:
         if self.ohlcv.empty:
             return None
-        return self.ohlcv[self.ohlcv.index >= (self.ohlcv.index[-1] - timedelta(365))].min()['종가']
+        return self._memo(
+            'min52w',
+            lambda: self.ohlcv[self.ohlcv.index >= (self.ohlcv.index[-1] - timedelta(365))].min()['종가']
+        )
 
     @property
     def ma(self) -> pd.DataFrame:
-        return pd.concat(objs={f'{w}D': self.close.rolling(w).mean() for w in [5, 10, 20, 60, 120, 200]}, axis=1)
+        return self._memo(
+            'ma',
+            lambda windows: pd.concat(objs={f'{w}D': self.close.rolling(w).mean() for w in windows}, axis=1),
+            windows=(5, 10, 20, 60, 120, 200)
+        )
 
     @property
     def relreturn(self) -> pd.DataFrame:
@@ -165,15 +371,7 @@ class _handle(_fetch):
         2023-03-08   99.047619  100.383509  135.421337  452.500793   991.440806  1238.370902
         2023-03-09   95.238095   96.548418  130.915665  441.926615   970.551987  1212.756148
         """
-        if hasattr(self, '__rr'):
-            return self.__getattribute__('__rr')
-        c = self.close
-        objs = {
-            label: 100 * (c[c.index >= c.index[-1] - timedelta(dt)].pct_change().fillna(0) + 1).cumprod() - 100
-            for label, dt in [('3M', 92), ('6M', 183), ('1Y', 365), ('2Y', 730), ('3Y', 1095), ('5Y', 1825)]
-        }
-        self.__setattr__('__rr', pd.concat(objs=objs, axis=1))
-        return self.__getattribute__('__rr')
+        return self._memo('relreturn', lambda: relative(close=self.close))
 
     @property
     def trendline(self) -> pd.DataFrame:
@@ -190,18 +388,16 @@ class _handle(_fetch):
         2023-03-08  197885.345819  184600.862307  164944.454908  138349.457048  121829.935383
         2023-03-09  200614.586903  186415.903992  165921.380023  138628.725794  121873.509657
         """
-        if hasattr(self, '__tl'):
-            return self.__getattribute__('__tl')
-        objs = list()
-        for gap, days in [('1M', 30), ('2M', 61), ('3M', 92), ('6M', 183), ('1Y', 365)]:
-            fitted = fit(series=self.typical[self.typical.index >= (self.typical.index[-1] - timedelta(days))])
-            objs.append(fitted.rename(columns={'Regression': gap}))
-        size = len(self.typical)
-        objs.append(fit(series=self.typical).rename(columns={'Regression': 'ALL'}))
-        objs.append(fit(series=self.typical.iloc[size / 2:]).rename(columns={'Regression': 'Half'}))
-        objs.append(fit(series=self.typical.iloc[size / 4:]).rename(columns={'Regression': 'Quarter'}))
-        self.__setattr__('__tl', pd.concat(objs=objs, axis=1))
-        return self.__getattribute__('__tl')
+        def _trendline():
+            typical = self.typical
+            starts = {
+                gap: typical.index.searchsorted(typical.index[-1] - timedelta(days))
+                for gap, days in [('1M', 30), ('2M', 61), ('3M', 92), ('6M', 183), ('1Y', 365)]
+            }
+            size = len(typical)
+            starts.update({'ALL': 0, 'Half': int(size / 2), 'Quarter': int(size / 4)})
+            return fits(series=typical, starts=starts)
+        return self._memo('trendline', _trendline)
 
     @property
     def trendstrength(self) -> pd.DataFrame:
@@ -211,13 +407,34 @@ class _handle(_fetch):
                     1M     2M      3M      6M      1Y
         247540  2.2986  2.288  1.2847  0.3191  0.0411
         """
-        objs = dict()
-        for col in self.trendline.columns:
-            tr = self.trendline[col].dropna()
-            dx, dy = (tr.index[-1] - tr.index[0]).days, 100 * (tr[-1] / tr[0] - 1)
-            slope = round(dy / dx, 4)
-            objs[col] = slope # Slope Strength
-        return pd.DataFrame(data=objs, index=[self.ticker])
+        def _trendstrength():
+            tl = self.trendline
+            data = tl.values
+            first = (~np.isnan(data)).argmax(axis=0)
+            dx = (tl.index[-1] - tl.index[first]).days.values
+            dy = 100 * (data[-1] / data[first, np.arange(data.shape[1])] - 1)
+            return pd.DataFrame(data=[np.round(dy / dx, 4)], columns=tl.columns, index=[self.ticker])
+        return self._memo('trendstrength', _trendstrength)
+
+    def rolling_trend(self, window:str or int='3M') -> pd.DataFrame:
+        """
+        Trailing price trend(: linear regression by typical price) on each date
+        :param window : [str] '1M', '2M', '3M', '6M', '1Y' or [int] number of trading days
+        :return: pd.DataFrame indexed by date(Time) of
+          - slope     : regression slope per day
+          - intercept : regression value at the date
+          - r2        : coefficient of determination
+          - strength  : trend strength as in trendstrength, [%/day] of regression start
+        """
+        def _rolling_trend(window:int):
+            df = rolling_fit(series=self.typical, window=window)
+            span = (df.index.to_series() - df.index.to_series().shift(window - 1)).dt.days
+            start = df.intercept - df.slope * span
+            df['strength'] = 100 * (df.intercept / start - 1) / span
+            return df
+        if isinstance(window, str):
+            window = {'1M': 21, '2M': 42, '3M': 63, '6M': 126, '1Y': 252}[window]
+        return self._memo('rolling_trend', _rolling_trend, window=window)
 
     @property
     def boundline(self) -> pd.DataFrame:
@@ -225,14 +442,15 @@ class _handle(_fetch):
 
         :return:
         """
-        if self.isohlcv():
-            resist = tip2tip(self.ohlcv.고가, 'top')
-            support = tip2tip(self.ohlcv.저가, 'bottom')
-        else:
-            resist = tip2tip(self.typical, 'top')
-            support = tip2tip(self.typical, 'bottom')
-        df = pd.concat(objs=dict(resist= resist, support=support), axis=1)
-        return df
+        def _boundline():
+            if self.isohlcv():
+                resist = bound(self.ohlcv.고가, 'top')
+                support = bound(self.ohlcv.저가, 'bottom')
+            else:
+                resist = bound(self.typical, 'top')
+                support = bound(self.typical, 'bottom')
+            return pd.concat(objs=dict(resist=resist, support=support), axis=1)
+        return self._memo('boundline', _boundline)
 
 if __name__ == "__main__":
     """
@@ -0,0 +1,170 @@
+from datetime import timedelta
+from snowball.timeseries._interface import relative, bound
+from snowball.archive import store
+import pandas as pd
+import numpy as np
+
+
+class PricePanel(object):
+    """
+    Aligned multi-ticker price data for cross-sectional work
+
+    data : contiguous array of (dates x tickers x fields), NaN where missing
+    mask : validity of (dates x tickers), True where the ticker has a bar on the date
+    All tickers share one trading-date axis(union of every ticker's dates).
+    """
+    fields = ('시가', '고가', '저가', '종가', '거래량')
+
+    def __init__(self, dates:pd.DatetimeIndex, tickers:list, data:np.ndarray, mask:np.ndarray=None):
+        self.dates = pd.DatetimeIndex(dates, name='날짜')
+        self.tickers = list(tickers)
+        self.data = np.ascontiguousarray(data)
+        self.mask = ~np.isnan(self.data[:, :, self.fields.index('종가')]) if mask is None else mask
+        return
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, ticker:str) -> pd.DataFrame:
+        n = self.tickers.index(ticker)
+        df = pd.DataFrame(data=self.data[:, n, :], index=self.dates, columns=list(self.fields))
+        return df[self.mask[:, n]]
+
+    @classmethod
+    def from_frames(cls, frames:dict, dtype=np.float64):
+        """
+        :param frames : {ticker: OHLCV(or 종가 only) pd.DataFrame / pd.Series}
+        :param dtype  : numpy dtype of data
+        """
+        frames = {t: f.to_frame(name='종가') if isinstance(f, pd.Series) else f for t, f in frames.items()}
+        dates = pd.DatetimeIndex(sorted(set().union(*[f.index for f in frames.values()]))) \
+            if frames else pd.DatetimeIndex([])
+        data = np.full((len(dates), len(frames), len(cls.fields)), np.nan, dtype=dtype)
+        for n, frame in enumerate(frames.values()):
+            rows = dates.get_indexer(frame.index)
+            for k, field in enumerate(cls.fields):
+                if field in frame.columns:
+                    data[rows, n, k] = frame[field].values
+        return cls(dates=dates, tickers=list(frames.keys()), data=data)
+
+    @classmethod
+    def from_timeseries(cls, objs:dict or list, dtype=np.float64):
+        """
+        :param objs  : {ticker: TimeSeries} (e.g. TimeSeries.batch) or list of TimeSeries
+        :param dtype : numpy dtype of data
+        """
+        objs = objs if isinstance(objs, dict) else {obj.ticker: obj for obj in objs}
+        return cls.from_frames({t: obj.ohlcv for t, obj in objs.items()}, dtype=dtype)
+
+    @classmethod
+    def from_store(cls, tickers:list, market:str='krse', dtype=np.float64):
+        """
+        Build from on-disk store without any network call; tickers not in store are skipped
+        :param tickers : [list] tickers(store key)
+        :param market  : [str] market of tickers
+        :param dtype   : numpy dtype of data
+        """
+        frames = dict()
+        for ticker in tickers:
+            stored, meta = store.read(market, ticker)
+            if stored is not None:
+                frames[ticker] = stored[stored.columns[0]] if meta['series'] else stored
+        return cls.from_frames(frames, dtype=dtype)
+
+    def field(self, name:str) -> pd.DataFrame:
+        return pd.DataFrame(data=self.data[:, :, self.fields.index(name)], index=self.dates, columns=self.tickers)
+
+    @property
+    def close(self) -> pd.DataFrame:
+        return self.field('종가')
+
+    @property
+    def typical(self) -> pd.DataFrame:
+        h, l, c = (self.data[:, :, self.fields.index(f)] for f in ('고가', '저가', '종가'))
+        typical = (h + l + c) / 3
+        return pd.DataFrame(data=np.where(np.isnan(typical), c, typical), index=self.dates, columns=self.tickers)
+
+    @property
+    def ma(self) -> pd.DataFrame:
+        """
+        Moving averages by bars of each ticker(not by dates of panel), so that gaps of other tickers never break windows
+        """
+        close = self.close
+        return pd.concat(
+            objs={
+                f'{w}D': pd.concat(objs={t: close[t].dropna().rolling(w).mean() for t in close.columns}, axis=1)
+                .reindex(index=close.index, columns=close.columns)
+                for w in [5, 10, 20, 60, 120, 200]
+            }, axis=1
+        )
+
+    def _last52w(self) -> pd.DataFrame:
+        """
+        Close prices in 365 days up to the last valid date of each ticker
+        """
+        close = self.close
+        last = close.apply(pd.Series.last_valid_index)
+        start = (last - timedelta(365)).values
+        return close.where((close.index.values[:, None] >= start) & (close.index.values[:, None] <= last.values))
+
+    @property
+    def max52w(self) -> pd.Series:
+        return self._last52w().max()
+
+    @property
+    def min52w(self) -> pd.Series:
+        return self._last52w().min()
+
+    @property
+    def relreturn(self) -> pd.DataFrame:
+        return relative(close=self.close)
+
+    @property
+    def boundline(self) -> pd.DataFrame:
+        return pd.concat(
+            objs=dict(
+                resist=bound(self.field('고가').where(self.field('고가').notna(), self.close), 'top'),
+                support=bound(self.field('저가').where(self.field('저가').notna(), self.close), 'bottom')
+            ), axis=1
+        )
+
+    @property
+    def trendstrength(self) -> pd.DataFrame:
+        """
+        Trend strength of typical price by ticker, as _handle.trendstrength, from masked cumulative sums
+        Every window ends at the ticker's own last valid bar, not at the last date of panel
+        :return: pd.DataFrame of tickers x (1M, 2M, 3M, 6M, 1Y, ALL, Half, Quarter)
+        """
+        typical = self.typical.values.astype(float)
+        valid = ~np.isnan(typical)
+        size, count = len(self.dates), valid.sum(axis=0)
+        x = np.broadcast_to(((self.dates - self.dates[-1]).days.values.astype(float))[:, None], typical.shape)
+        y = np.where(valid, typical, 0.0)
+        x = np.where(valid, x, 0.0)
+
+        cum = np.zeros((5, size + 1, typical.shape[1]))
+        cum[:, 1:] = np.cumsum([x, y, x * y, x * x, valid.astype(float)], axis=1)
+        rows = np.arange(size)[:, None]
+        after = np.minimum.accumulate(np.where(valid, rows, size)[::-1], axis=0)[::-1]  # next valid row
+        last = size - 1 - valid[::-1].argmax(axis=0)
+        cols = np.arange(typical.shape[1])
+
+        starts = {
+            gap: self.dates.searchsorted(self.dates[last] - timedelta(days))
+            for gap, days in [('1M', 30), ('2M', 61), ('3M', 92), ('6M', 183), ('1Y', 365)]
+        }
+        order = np.cumsum(valid, axis=0)
+        starts['ALL'] = after[0]
+        starts['Half'] = (order > count // 2).argmax(axis=0)
+        starts['Quarter'] = (order > count // 4).argmax(axis=0)
+
+        objs = dict()
+        for label in ['1M', '2M', '3M', '6M', '1Y', 'ALL', 'Half', 'Quarter']:
+            i = np.minimum(after[np.minimum(starts[label], size - 1), cols], size - 1)
+            sx, sy, sxy, sxx, m = cum[:, last + 1, cols] - cum[:, i, cols]
+            slope = (m * sxy - sx * sy) / (m * sxx - sx * sx)
+            intercept = (sy - slope * sx) / m
+            x0, x1 = x[i, cols], x[last, cols]
+            y0, y1 = slope * x0 + intercept, slope * x1 + intercept
+            objs[label] = np.round(100 * (y1 / y0 - 1) / (x1 - x0), 4)
+        return pd.DataFrame(data=objs, index=self.tickers)
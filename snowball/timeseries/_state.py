@@ -0,0 +1,203 @@
+from datetime import datetime
+from collections import deque
+from snowball.define import atomic
+import pandas as pd
+import numpy as np
+import os
+
+
+class _state(object):
+    """
+    Incremental indicator state, advanced one bar at a time in O(1)(amortized)
+
+    Every window is a start pointer into the bar history with its running sums:
+      - ma        : rolling sums of 종가 by 5, 10, 20, 60, 120, 200 bars
+      - max52w    : monotonic deques of 종가 in 365 days
+      - relreturn : start of 3M / 6M / 1Y / 2Y / 3Y / 5Y
+      - trend     : regression accumulators(Σx, Σy, Σxy, Σx²) of typical price by 1M ... 1Y, ALL, Half, Quarter
+    Values are equal to those of _handle computed from the same bars.
+    """
+    _ma = (5, 10, 20, 60, 120, 200)
+    _rr = (('3M', 92), ('6M', 183), ('1Y', 365), ('2Y', 730), ('3Y', 1095), ('5Y', 1825))
+    _tr = (('1M', 30), ('2M', 61), ('3M', 92), ('6M', 183), ('1Y', 365), ('ALL', 0), ('Half', 2), ('Quarter', 4))
+
+    def __init__(self):
+        self.dates, self.close, self.typical = list(), list(), list()
+        self.msum = [0.0] * len(self._ma)
+        self.rr = [0] * len(self._rr)
+        self.w52 = 0
+        self.high52, self.low52 = deque(), deque()
+        self.tr = [0] * len(self._tr)
+        self.tsum = [[0.0] * 4 for _ in self._tr]
+        return
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def date(self) -> pd.Timestamp or None:
+        return pd.Timestamp(datetime.fromordinal(self.dates[-1])) if self.dates else None
+
+    def _x(self, n:int) -> float:
+        return float(self.dates[n] - self.dates[0])
+
+    def update(self, date:datetime, high:float, low:float, close:float):
+        """
+        Advance state with a new bar
+        :param date  : date of bar, must be later than state.date
+        :param high  : 고가, NaN if not available
+        :param low   : 저가, NaN if not available
+        :param close : 종가, bar is skipped if NaN(e.g. holiday of fred) so that running sums are never poisoned
+        """
+        if np.isnan(close):
+            return self
+        n, d = len(self.dates), date.toordinal()
+        if n and d <= self.dates[-1]:
+            raise KeyError(f'Bar of {date} is not later than {self.date}')
+        typical = close if np.isnan(high) or np.isnan(low) else (high + low + close) / 3
+        self.dates.append(d)
+        self.close.append(close)
+        self.typical.append(typical)
+
+        for k, w in enumerate(self._ma):
+            self.msum[k] += close
+            if n >= w:
+                self.msum[k] -= self.close[n - w]
+
+        for k, (_, days) in enumerate(self._rr):
+            while self.dates[self.rr[k]] < d - days:
+                self.rr[k] += 1
+
+        while self.dates[self.w52] < d - 365:
+            self.w52 += 1
+        for q, higher in ((self.high52, True), (self.low52, False)):
+            while q and ((self.close[q[-1]] <= close) if higher else (self.close[q[-1]] >= close)):
+                q.pop()
+            q.append(n)
+            while q[0] < self.w52:
+                q.popleft()
+
+        x = self._x(n)
+        for k, (label, days) in enumerate(self._tr):
+            s = self.tsum[k]
+            s[0], s[1], s[2], s[3] = s[0] + x, s[1] + typical, s[2] + x * typical, s[3] + x * x
+            while True:
+                i = self.tr[k]
+                if label in ('Half', 'Quarter'):
+                    expired = i < int((n + 1) / days)
+                else:
+                    expired = bool(days) and self.dates[i] < d - days
+                if not expired:
+                    break
+                xi, yi = self._x(i), self.typical[i]
+                s[0], s[1], s[2], s[3] = s[0] - xi, s[1] - yi, s[2] - xi * yi, s[3] - xi * xi
+                self.tr[k] += 1
+        return self
+
+    def advance(self, ohlcv:pd.DataFrame):
+        """
+        Advance state with bars later than state.date
+        :param ohlcv : OHLCV(or 종가 only) time-series
+        """
+        ohlcv = ohlcv[ohlcv['종가'].notna()]
+        if self.dates:
+            ohlcv = ohlcv[ohlcv.index > self.date.strftime("%Y-%m-%d")]
+        nan = np.full(len(ohlcv), np.nan)
+        high = ohlcv['고가'].values.astype(float) if '고가' in ohlcv else nan
+        low = ohlcv['저가'].values.astype(float) if '저가' in ohlcv else nan
+        for date, h, l, c in zip(ohlcv.index, high, low, ohlcv['종가'].values.astype(float)):
+            self.update(date, h, l, c)
+        return self
+
+    @property
+    def ma(self) -> pd.Series:
+        n = len(self.close)
+        return pd.Series(
+            data=[s / w if n >= w else np.nan for s, w in zip(self.msum, self._ma)],
+            index=[f'{w}D' for w in self._ma], dtype=float
+        )
+
+    @property
+    def max52w(self) -> float:
+        return self.close[self.high52[0]] if self.high52 else None
+
+    @property
+    def min52w(self) -> float:
+        return self.close[self.low52[0]] if self.low52 else None
+
+    @property
+    def relreturn(self) -> pd.Series:
+        return pd.Series(
+            data=[100 * (self.close[-1] / self.close[i] - 1) for i in self.rr],
+            index=[label for label, _ in self._rr], dtype=float
+        )
+
+    @property
+    def trendstrength(self) -> pd.Series:
+        objs = dict()
+        n = len(self.dates)
+        for (label, _), i, (sx, sy, sxy, sxx) in zip(self._tr, self.tr, self.tsum):
+            m = n - i
+            slope = (m * sxy - sx * sy) / (m * sxx - sx * sx) if m > 1 else np.nan
+            intercept = (sy - slope * sx) / m
+            x0, x1 = self._x(i), self._x(n - 1)
+            y0, y1 = slope * x0 + intercept, slope * x1 + intercept
+            objs[label] = round(100 * (y1 / y0 - 1) / (x1 - x0), 4) if x1 > x0 else np.nan
+        return pd.Series(objs, dtype=float)
+
+    def save(self, path:str):
+        """
+        :param path : file path(.npz), written atomically
+        """
+        with atomic(path, 'wb') as f:
+            np.savez(
+                f,
+                dates=np.array(self.dates, dtype=np.int64),
+                close=np.array(self.close, dtype=float),
+                typical=np.array(self.typical, dtype=float),
+                msum=np.array(self.msum, dtype=float),
+                rr=np.array(self.rr, dtype=np.int64),
+                w52=np.array([self.w52], dtype=np.int64),
+                high52=np.array(self.high52, dtype=np.int64),
+                low52=np.array(self.low52, dtype=np.int64),
+                tr=np.array(self.tr, dtype=np.int64),
+                tsum=np.array(self.tsum, dtype=float)
+            )
+        return
+
+    @classmethod
+    def load(cls, path:str):
+        """
+        :param path : file path(.npz)
+        :return: stored state, or empty state if not exist
+        """
+        state = cls()
+        if not os.path.isfile(path):
+            return state
+        with np.load(path) as src:
+            state.dates, state.close, state.typical = src['dates'].tolist(), src['close'].tolist(), src['typical'].tolist()
+            state.msum, state.rr, state.w52 = src['msum'].tolist(), src['rr'].tolist(), int(src['w52'][0])
+            state.high52, state.low52 = deque(src['high52'].tolist()), deque(src['low52'].tolist())
+            state.tr, state.tsum = src['tr'].tolist(), src['tsum'].tolist()
+        return state
+
+
+if __name__ == "__main__":
+    # Check: series with embedded NaN(fred holidays) equals full recompute on its valid bars
+    rand = np.random.default_rng(0)
+    close = pd.Series(
+        data=100 + rand.standard_normal(1500).cumsum(),
+        index=pd.bdate_range(end='2023-03-09', periods=1500, name='날짜'),
+        name='종가'
+    )
+    close[rand.choice(len(close), 60, replace=False)] = np.nan
+    ohlcv, valid = close.to_frame(), close.dropna()
+
+    state = _state().advance(ohlcv.iloc[:1000]).advance(ohlcv.iloc[1000:])
+    full = _state().advance(valid.to_frame())
+    ma = pd.Series({f'{w}D': valid.rolling(w).mean().iloc[-1] for w in _state._ma})
+    assert np.allclose(state.ma, ma) and np.allclose(state.ma, full.ma)
+    assert np.allclose(state.relreturn, full.relreturn) and not state.relreturn.isna().any()
+    assert np.allclose(state.trendstrength, full.trendstrength, equal_nan=True)
+    assert state.max52w == valid[valid.index >= valid.index[-1] - pd.Timedelta(days=365)].max()
+    print(f'NaN bars skipped: {len(close) - len(state)} / state equals full recompute')
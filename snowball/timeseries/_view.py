@@ -1,53 +1,57 @@
 from snowball.timeseries._interface import _handle
-import plotly.graph_objects as go
+from snowball.define import lazy
+
+go = lazy('plotly.graph_objects')
 
 
 class _trace(_handle):
 
+    _depends = dict(
+        _handle._depends,
+        trace_ohlcv=('ohlcv', ),
+        trace_volume=('ohlcv', ),
+    )
+
     def trace_ohlcv(self):
-        if not hasattr(self, '__candle'):
-            self.__setattr__(
-                '__candle',
-                go.Candlestick(
-                    name=self.name,
-                    x=self.ohlcv.index,
-                    open=self.ohlcv.시가,
-                    high=self.ohlcv.고가,
-                    low=self.ohlcv.저가,
-                    close=self.ohlcv.종가,
-                    visible=True,
-                    showlegend=True,
-                    increasing_line=dict(
-                        color='red'
-                    ),
-                    decreasing_line=dict(
-                        color='royalblue'
-                    ),
-                    xhoverformat='%Y/%m/%d',
-                    yhoverformat=self.dtype
-                )
+        return self._memo(
+            'trace_ohlcv',
+            lambda: go.Candlestick(
+                name=self.name,
+                x=self.ohlcv.index,
+                open=self.ohlcv.시가,
+                high=self.ohlcv.고가,
+                low=self.ohlcv.저가,
+                close=self.ohlcv.종가,
+                visible=True,
+                showlegend=True,
+                increasing_line=dict(
+                    color='red'
+                ),
+                decreasing_line=dict(
+                    color='royalblue'
+                ),
+                xhoverformat='%Y/%m/%d',
+                yhoverformat=self.dtype
             )
-        return self.__getattribute__('__candle')
+        )
 
     def trace_volume(self):
-        if not hasattr(self, '__vol'):
-            self.__setattr__(
-                '__vol',
-                go.Bar(
-                    name=f'{self.name} V',
-                    x=self.ohlcv.index,
-                    y=self.ohlcv.거래량,
-                    marker=dict(
-                        color=self.ohlcv.거래량.pct_change().apply(lambda x: 'royalblue' if x < 0 else 'red')
-                    ),
-                    visible=True,
-                    showlegend=False,
-                    xhoverformat='%Y/%m/%d',
-                    yhoverformat=',',
-                    hovertemplate='%{x}<br>%{y}<extra></extra>'
-                )
+        return self._memo(
+            'trace_volume',
+            lambda: go.Bar(
+                name=f'{self.name} V',
+                x=self.ohlcv.index,
+                y=self.ohlcv.거래량,
+                marker=dict(
+                    color=self.ohlcv.거래량.pct_change().apply(lambda x: 'royalblue' if x < 0 else 'red')
+                ),
+                visible=True,
+                showlegend=False,
+                xhoverformat='%Y/%m/%d',
+                yhoverformat=',',
+                hovertemplate='%{x}<br>%{y}<extra></extra>'
             )
-        return self.__getattribute__('__vol')
+        )
 
     def trace_ma(self, col:str):
         return go.Scatter(
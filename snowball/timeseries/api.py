@@ -1,16 +1,21 @@
-from snowball.timeseries._view import _trace
-from plotly.subplots import make_subplots
-from plotly.offline import plot
+from snowball.timeseries._view import _trace, go
+from snowball.define import lazy
+from snowball.writer import save
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+import pandas as pd
 import os
 
+subplots = lazy('plotly.subplots')
 
-def _call(fig: go.Figure or make_subplots or str, mode: str, filedir: str):
+
+def _call(fig: 'go.Figure or str', mode: str, filedir: str):
     if mode.startswith('fig'):
         return fig
     elif mode.startswith('show'):
         fig.show()
     elif mode.startswith('save'):
-        plot(fig, filename=filedir, auto_open=False)
+        save(fig, filedir)
     else:
         raise KeyError
     return
@@ -29,11 +34,54 @@ class TimeSeries(_trace):
 
     def __init__(self, ticker:str, label:str=str()):
         super().__init__(ticker=ticker, label=label)
-        self.__p = os.path.join(os.path.join(os.environ['USERPROFILE']), rf'Desktop/snob/{self.ticker} {self.name}')
+        home = os.environ.get('USERPROFILE', os.path.expanduser('~'))
+        self.__p = os.path.join(home, rf'Desktop/snob/{self.ticker} {self.name}')
         if not os.path.isdir(self.__p):
             os.makedirs(self.__p)
         return
 
+    @classmethod
+    def batch(
+        cls,
+        tickers:list,
+        period:int or float=20,
+        enddate:str=str(),
+        workers:int=8,
+        field:str=str()
+    ) -> dict or pd.DataFrame:
+        """
+        Load many time-series at once, fetching in a bounded thread pool.
+        Concurrent requests per source are further limited by snowball.timeseries._fetch.limits
+        :param tickers : [list] ticker or (ticker, label) for ecos
+        :param period  : [int or float] period in years
+        :param enddate : [str] YYYYMMDD, default today
+        :param workers : [int] maximum number of threads
+        :param field   : [str] if given(e.g. '종가'), return combined frame of the field by ticker
+        :return: dict of {ticker or (ticker, label): TimeSeries} or pd.DataFrame of field
+        """
+        objs = dict()
+        for key in tickers:
+            ticker, label = key if isinstance(key, tuple) else (key, str())
+            key = (ticker, label) if label else ticker
+            if key in objs:
+                raise KeyError(f"Duplicate ticker: {key}")
+            obj = cls(ticker=ticker, label=label)
+            obj.period = period
+            if enddate:
+                obj.enddate = enddate
+            objs[key] = obj
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            jobs = {executor.submit(obj.isohlcv): ticker for ticker, obj in objs.items()}
+            for job in tqdm(as_completed(jobs), total=len(jobs), desc='Fetch Time-series'):
+                if job.exception() is not None:
+                    print(f"\t- Failed fetching {jobs[job]}: {job.exception()}")
+                    objs.pop(jobs[job])
+
+        if not field:
+            return objs
+        return pd.concat(objs={ticker: obj.ohlcv[field] for ticker, obj in objs.items()}, axis=1)
+
     @property
     def path(self) -> str:
         return self.__p
@@ -45,7 +93,7 @@ class TimeSeries(_trace):
         self.__p = path
 
     def _ohlcv(self):
-        fig = make_subplots(
+        fig = subplots.make_subplots(
             rows=2, cols=1,
             row_heights=[0.8, 0.2],
             shared_xaxes=True,
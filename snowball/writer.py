@@ -0,0 +1,86 @@
+from contextvars import ContextVar
+from snowball.define import lazy, atomic
+import os
+
+offline = lazy('plotly.offline')
+_active = ContextVar('writer', default=None)
+
+
+class writer(object):
+    """
+    Collector of "save" outputs(figures) to share one plotly.js instead of embedding it(~4.8MB) in every file
+
+      1) path of .html : every figure is written into one document, in order of save
+      2) directory     : every figure is written to its own file as before, referencing one {path}/plotly.min.js
+    Outside of writer, "save" writes standalone file as before.
+
+    e.g.
+        with writer(r'.../005930.html'):
+            stock.statement('save')
+            stock.marketcap('save')
+    """
+    def __init__(self, path:str):
+        self.path = path
+        self.figures = list()
+        return
+
+    def __enter__(self):
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _active.reset(self._token)
+        if self.single and self.figures:
+            self.write()
+        return False
+
+    @property
+    def single(self) -> bool:
+        return self.path.endswith('.html')
+
+    @property
+    def asset(self) -> str:
+        """
+        :return: shared plotly.js of directory mode, written once
+        """
+        asset = os.path.join(self.path, 'plotly.min.js')
+        if not os.path.isfile(asset):
+            with atomic(asset) as f:
+                f.write(offline.get_plotlyjs())
+        return asset
+
+    def add(self, fig, filedir:str):
+        if self.single:
+            self.figures.append((os.path.basename(filedir), fig))
+            return
+        src = os.path.relpath(self.asset, os.path.dirname(os.path.abspath(filedir))).replace(os.sep, '/')
+        fig.write_html(filedir, include_plotlyjs=src)
+        return
+
+    def write(self):
+        """
+        Write collected figures into one document
+        """
+        body = '\n'.join(
+            f'<h3>{name}</h3>\n' + fig.to_html(full_html=False, include_plotlyjs=False, default_height='90vh')
+            for name, fig in self.figures
+        )
+        with atomic(self.path) as f:
+            f.write(
+                '<!doctype html>\n<html>\n<head>\n<meta charset="utf-8" />\n'
+                f'<script type="text/javascript">{offline.get_plotlyjs()}</script>\n'
+                f'</head>\n<body>\n{body}\n</body>\n</html>'
+            )
+        return
+
+
+def save(fig, filedir:str):
+    """
+    "save" mode of components: into active writer if any, otherwise standalone file
+    """
+    active = _active.get()
+    if active is None:
+        offline.plot(fig, filename=filedir, auto_open=False)
+    else:
+        active.add(fig, filedir)
+    return